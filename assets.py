@@ -0,0 +1,136 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from jinja2 import Environment, FileSystemLoader
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always generated
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+ENCODING_SUFFIXES = {"gzip": "gz", "br": "br"}
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+@dataclass
+class BuiltAsset:
+    """One asset held in memory with its precompressed variants"""
+    body: bytes
+    media_type: str
+    etag: str
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Strong validator of the bytes actually sent: each encoding gets its own"""
+        if encoding is None:
+            return self.etag
+        return f'{self.etag[:-1]}-{ENCODING_SUFFIXES[encoding]}"'
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    """Parse Accept-Encoding into {coding: q}; q=0 entries are kept because they refuse a coding"""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def _fingerprint(name: str, digest: str) -> str:
+    stem, dot, suffix = name.rpartition(".")
+    return f"{stem}.{digest}.{suffix}" if dot else f"{name}.{digest}"
+
+
+def _build(body: bytes, media_type: str) -> BuiltAsset:
+    asset = BuiltAsset(body=body, media_type=media_type, etag=f'"{hashlib.sha256(body).hexdigest()[:16]}"')
+    if media_type.startswith(COMPRESSIBLE_TYPES) and len(body) > 256:
+        asset.gzip = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            asset.br = brotli.compress(body, quality=11)
+    return asset
+
+
+class AssetPipeline:
+    """Fingerprints and precompresses static files and renders the landing page once at startup"""
+
+    def __init__(self, static_dir: Path, template_dir: Path, url_prefix: str = "/static"):
+        self.static_dir = Path(static_dir)
+        self.template_dir = Path(template_dir)
+        self.url_prefix = url_prefix
+        self.manifest: Dict[str, str] = {}
+        self.assets: Dict[str, BuiltAsset] = {}
+        self.index: Optional[BuiltAsset] = None
+
+    def build(self) -> "AssetPipeline":
+        for path in sorted(p for p in self.static_dir.rglob("*") if p.is_file()):
+            name = path.relative_to(self.static_dir).as_posix()
+            body = path.read_bytes()
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            asset = _build(body, media_type)
+            hashed = _fingerprint(name, hashlib.sha256(body).hexdigest()[:12])
+            self.manifest[name] = hashed
+            self.assets[hashed] = asset
+            # The plain name keeps working for old links, but must be revalidated
+            self.assets[name] = asset
+
+        env = Environment(loader=FileSystemLoader(str(self.template_dir)), autoescape=True)
+        env.globals["asset"] = self.url_for
+        html = env.get_template("index.html").render().encode("utf-8")
+        self.index = _build(html, "text/html; charset=utf-8")
+
+        logging.info(
+            f"📦 Built {len(self.manifest)} static assets (brotli {'on' if brotli else 'off'}), "
+            f"index {len(html)} bytes"
+        )
+        return self
+
+    def url_for(self, name: str) -> str:
+        return f"{self.url_prefix}/{self.manifest.get(name, name)}"
+
+    def _respond(self, asset: BuiltAsset, headers, cache_control: str) -> Response:
+        accepted = _accepted_encodings(headers.get("accept-encoding") or "")
+        wildcard = accepted.get("*", 0.0)
+        body, encoding = asset.body, None
+        if asset.br is not None and accepted.get("br", wildcard) > 0:
+            body, encoding = asset.br, "br"
+        elif asset.gzip is not None and accepted.get("gzip", wildcard) > 0:
+            body, encoding = asset.gzip, "gzip"
+
+        response_headers = {"ETag": asset.etag_for(encoding), "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if response_headers["ETag"] in (headers.get("if-none-match") or ""):
+            return Response(status_code=304, headers=response_headers)
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=asset.media_type, headers=response_headers)
+
+    def static_response(self, path: str, headers) -> Optional[Response]:
+        asset = self.assets.get(path)
+        if asset is None:
+            return None
+        cache_control = REVALIDATE if path in self.manifest else IMMUTABLE
+        return self._respond(asset, headers, cache_control)
+
+    def index_response(self, headers) -> Response:
+        return self._respond(self.index, headers, REVALIDATE)
@@ -0,0 +1,11 @@
+import asyncio
+from typing import Optional
+
+
+def discard(future: Optional[asyncio.Future]):
+    """Cancel a losing future and swallow whatever it eventually produces"""
+    if future is None:
+        return
+    if not future.done():
+        future.cancel()
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
@@ -0,0 +1,146 @@
+import asyncio
+import base64
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+
+class AudioStore:
+    """Content-addressed MP3 store: identical audio is written once and keyed by its SHA-256"""
+
+    DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, digest: str) -> Optional[Path]:
+        if not self.DIGEST_RE.match(digest):
+            return None
+        path = self.directory / f"{digest}.mp3"
+        return path if path.exists() else None
+
+    def _write(self, digest: str, audio: bytes):
+        path = self.directory / f"{digest}.mp3"
+        if path.exists():
+            return
+        # Unique temp file per writer: two identical clips may be stored at the same time
+        with tempfile.NamedTemporaryFile(dir=self.directory, prefix=f"{digest}.", suffix=".tmp", delete=False) as tmp:
+            tmp.write(audio)
+        try:
+            os.replace(tmp.name, path)
+        except OSError:
+            os.unlink(tmp.name)
+            raise
+
+    async def put(self, audio: bytes) -> str:
+        digest = hashlib.sha256(audio).hexdigest()
+        await asyncio.get_running_loop().run_in_executor(None, self._write, digest, audio)
+        return digest
+
+
+class BatchCollector:
+    """Stands in for the client WebSocket and collects what the voice pipeline sends"""
+
+    def __init__(self):
+        self.text_parts: List[str] = []
+        self.audio_parts: List[bytes] = []
+        self.error: Optional[str] = None
+
+    async def send_text(self, text: str):
+        message = json.loads(text)
+        kind = message.get("type")
+        if kind == "llm_chunk":
+            self.text_parts.append(message.get("data") or "")
+        elif kind == "audio" and message.get("data"):
+            self.audio_parts.append(base64.b64decode(message["data"]))
+        elif kind == "error":
+            self.error = message.get("message")
+
+    @property
+    def text(self) -> str:
+        return "".join(self.text_parts).strip()
+
+    @property
+    def audio(self) -> bytes:
+        return b"".join(self.audio_parts)
+
+
+class BatchStats:
+    """Totals across all batches served by this process"""
+
+    def __init__(self):
+        self.batches = 0
+        self.queries = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+
+    def record(self, queries: int, failures: int, elapsed: float):
+        self.batches += 1
+        self.queries += queries
+        self.failures += failures
+        self.busy_seconds += elapsed
+
+    def snapshot(self) -> dict:
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "failures": self.failures,
+            "queries_per_second": round(self.queries / self.busy_seconds, 2) if self.busy_seconds else 0.0,
+        }
+
+
+batch_stats = BatchStats()
+
+
+async def run_batch(
+    queries: List[str],
+    process: Callable[[int, str], Awaitable[dict]],
+    concurrency: int,
+    shared_slots: Optional[asyncio.Semaphore] = None,
+) -> AsyncIterator[str]:
+    """Run ``process`` over ``queries`` with at most ``concurrency`` in flight, yielding NDJSON lines as they finish.
+
+    ``shared_slots`` additionally bounds pipelines across every batch running in the process.
+    """
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def worker(index: int, query: str) -> dict:
+        async with semaphore:
+            async with shared_slots or contextlib.nullcontext():
+                try:
+                    return await process(index, query)
+                except Exception as e:
+                    logging.error(f"Batch item {index} failed: {e}")
+                    return {"index": index, "error": "processing_failed", "message": str(e), "query": query,
+                            "response": "", "audio_url": ""}
+
+    tasks = [asyncio.create_task(worker(i, q)) for i, q in enumerate(queries)]
+    failures = 0
+    try:
+        for finished in asyncio.as_completed(tasks):
+            line = await finished
+            failures += "error" in line
+            yield json.dumps(line) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    elapsed = time.perf_counter() - started
+    batch_stats.record(len(queries), failures, elapsed)
+    yield json.dumps({
+        "type": "summary",
+        "total": len(queries),
+        "succeeded": len(queries) - failures,
+        "failed": failures,
+        "elapsed_s": round(elapsed, 3),
+        "queries_per_second": round(len(queries) / elapsed, 2) if elapsed else 0.0,
+    }) + "\n"
@@ -0,0 +1,82 @@
+"""Landing-page requests per second: per-request template rendering vs the prebuilt asset pipeline.
+
+Both variants are driven in-process through ASGI, so the numbers measure the
+application's own cost per request, not the network. Run from the repository root:
+
+    python benchmarks/landing_page_rps.py --requests 3000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from main import app as pipeline_app  # noqa: E402
+from main import assets  # noqa: E402
+
+
+def _baseline_app() -> FastAPI:
+    """The landing page as it was served before the asset pipeline"""
+    app = FastAPI()
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+    templates = Jinja2Templates(directory="templates")
+    templates.env.globals["asset"] = lambda name: f"/static/{name}"
+
+    @app.get("/")
+    async def home(request: Request):
+        return templates.TemplateResponse(request, "index.html")
+
+    return app
+
+
+async def _measure(app, paths, total: int, concurrency: int, headers: dict) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        async def worker(remaining):
+            for i in remaining:
+                response = await client.get(paths[i % len(paths)])
+                assert response.status_code in (200, 304), response.status_code
+
+        await worker(range(min(100, total)))
+        remaining = iter(range(total))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(remaining) for _ in range(concurrency)))
+        return total / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    page_load_baseline = ["/", "/static/style.css", "/static/script.js"]
+    page_load_pipeline = ["/", assets.url_for("style.css"), assets.url_for("script.js")]
+    encoding = {"Accept-Encoding": "br, gzip"}
+    scenarios = [
+        ("GET / (render per request)", _baseline_app(), ["/"], {}),
+        ("GET / (prebuilt)", pipeline_app, ["/"], encoding),
+        ("GET / revalidated (304)", pipeline_app, ["/"], {**encoding, "If-None-Match": assets.index.etag_for("br" if assets.index.br else "gzip")}),
+        ("page + assets (before)", _baseline_app(), page_load_baseline, {}),
+        ("page + assets (prebuilt)", pipeline_app, page_load_pipeline, encoding),
+    ]
+
+    print(f"requests={args.requests} concurrency={args.concurrency}")
+    for label, app, paths, headers in scenarios:
+        rps = await _measure(app, paths, args.requests, args.concurrency, headers)
+        print(f"{label:<30} {rps:>9.0f} req/s")
+
+    print(f"index bytes: raw={len(assets.index.body)} gzip={len(assets.index.gzip or b'')} br={len(assets.index.br or b'')}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""Session-store throughput as uvicorn-style worker processes are added.
+
+Each worker process simulates conversation turns against the shared store:
+load the session, append a user/model exchange, save it back. Run from the
+repository root:
+
+    python benchmarks/session_store_scaling.py --store sqlite:///bench_sessions.db --workers 4
+    python benchmarks/session_store_scaling.py --store redis://localhost:6379/0 --workers 8
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import SessionState, create_session_store  # noqa: E402
+
+PROMPT = "You are Astra, an AI assistant. Keep responses short and conversational. " * 4
+
+
+async def _run_worker(store_url: str, worker: int, sessions: int, duration: float) -> int:
+    store = create_session_store(store_url)
+    session_ids = [f"bench-{worker}-{i}" for i in range(sessions)]
+    for session_id in session_ids:
+        await store.save(session_id, SessionState())
+
+    turns = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        session_id = session_ids[turns % sessions]
+        state = await store.load(session_id) or SessionState()
+        state.chat_history.append({"role": "user", "parts": [f'{PROMPT}User said: "question {turns}"']})
+        state.chat_history.append({"role": "model", "parts": [f"Answer number {turns}."]})
+        await store.save(session_id, state)
+        turns += 1
+
+    for session_id in session_ids:
+        await store.delete(session_id)
+    await store.close()
+    return turns
+
+
+def _worker_main(args):
+    return asyncio.run(_run_worker(*args))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--store", default="sqlite:///bench_sessions.db")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--sessions", type=int, default=50, help="sessions per worker")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per measurement")
+    args = parser.parse_args()
+
+    if args.store.startswith("memory"):
+        parser.error("memory:// is per-process and cannot be shared between workers")
+
+    print(f"store={args.store} sessions/worker={args.sessions} duration={args.duration}s")
+    print(f"{'workers':>7} {'turns/s':>10} {'speedup':>8} {'efficiency':>10}")
+    baseline = None
+    for workers in range(1, args.workers + 1):
+        jobs = [(args.store, w, args.sessions, args.duration) for w in range(workers)]
+        with multiprocessing.Pool(workers) as pool:
+            turns = sum(pool.map(_worker_main, jobs))
+        rate = turns / args.duration
+        baseline = baseline or rate
+        speedup = rate / baseline
+        print(f"{workers:>7} {rate:>10.0f} {speedup:>7.2f}x {speedup / workers:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
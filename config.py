@@ -8,6 +8,49 @@ ASSEMBLYAI_API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
 MURF_API_KEY = os.getenv("MURF_API_KEY")
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 
+# Seconds a direct skill may take before the Gemini fallback answers instead; once the racing
+# Gemini request has its first token the skill only gets SKILL_LLM_GRACE more seconds
+WEATHER_SKILL_DEADLINE = float(os.getenv("WEATHER_SKILL_DEADLINE", "2.0"))
+SKILL_LLM_GRACE = float(os.getenv("SKILL_LLM_GRACE", "0.3"))
+SEARCH_SKILL_DEADLINE = float(os.getenv("SEARCH_SKILL_DEADLINE", "2.5"))
+
+# Tavily search endpoint (point at a local stub for testing) and result cache lifetime in seconds
+TAVILY_API_URL = os.getenv("TAVILY_API_URL", "https://api.tavily.com")
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+
+# Hedged Gemini requests: duplicate a request whose first token is slower than the
+# recent GEMINI_HEDGE_PERCENTILE (clamped to the min/max delay), at most GEMINI_HEDGE_BUDGET
+# of all requests. GEMINI_HEDGE_MODEL optionally sends the hedge to a faster model.
+GEMINI_HEDGING = os.getenv("GEMINI_HEDGING", "true").lower() in ("1", "true", "yes")
+GEMINI_HEDGE_MODEL = os.getenv("GEMINI_HEDGE_MODEL", "")
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "0.9"))
+GEMINI_HEDGE_MIN_DELAY = float(os.getenv("GEMINI_HEDGE_MIN_DELAY", "0.8"))
+GEMINI_HEDGE_MAX_DELAY = float(os.getenv("GEMINI_HEDGE_MAX_DELAY", "4.0"))
+GEMINI_HEDGE_BUDGET = float(os.getenv("GEMINI_HEDGE_BUDGET", "0.1"))
+
+# Adaptive end-of-turn detection; TURN_CONTROL_RATIO of sessions keep the static
+# AssemblyAI defaults so /metrics/turns can compare against a baseline
+TURN_ADAPTIVE = os.getenv("TURN_ADAPTIVE", "true").lower() in ("1", "true", "yes")
+TURN_CONTROL_RATIO = float(os.getenv("TURN_CONTROL_RATIO", "0.1"))
+
+# Batch text-to-voice API: worker limit per batch and where content-addressed audio is kept
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+AUDIO_STORE_DIR = os.getenv("AUDIO_STORE_DIR", "audio_store")
+
+# Words of a new utterance needed before the agent stops talking (barge-in)
+BARGE_IN_MIN_WORDS = int(os.getenv("BARGE_IN_MIN_WORDS", "2"))
+
+# Session state backend shared by all workers: memory://, sqlite:///sessions.db or redis://host:6379/0
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "memory://")
+SESSION_TTL = int(os.getenv("SESSION_TTL", "86400"))
+
+# Diagnostics: DIAGNOSTICS turns on the event-loop lag monitor and per-session CPU accounting.
+# ADMIN_TOKEN enables the /admin/profile sampling profiler (the endpoint does not exist when empty)
+DIAGNOSTICS = os.getenv("DIAGNOSTICS", "false").lower() in ("1", "true", "yes")
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "250"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
 if not GEMINI_API_KEY:
     print("⚠️ Warning: GEMINI_API_KEY not loaded from .env")
 if not ASSEMBLYAI_API_KEY:
@@ -15,4 +58,4 @@ if not ASSEMBLYAI_API_KEY:
 if not MURF_API_KEY:
     print("⚠️ Warning: MURF_API_KEY not loaded from .env")
 if not TAVILY_API_KEY:
-    print("⚠️ Warning: TAVILY_API_KEY not loaded from .env")
\ No newline at end of file
+    print("⚠️ Warning: TAVILY_API_KEY not loaded from .env")
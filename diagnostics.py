@@ -0,0 +1,217 @@
+import asyncio
+import collections.abc
+import contextlib
+import contextvars
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Dict, Optional
+
+from metrics import LatencyTracker
+
+# Session a piece of event-loop work belongs to; tasks inherit it when they are created
+current_session: contextvars.ContextVar = contextvars.ContextVar("current_session", default=None)
+
+
+def session_label(session_id: str) -> str:
+    """Short stable label so resume tokens never show up in diagnostics output"""
+    return hashlib.sha256(session_id.encode()).hexdigest()[:10]
+
+
+class SessionCpuAccounting:
+    """CPU seconds spent on behalf of each live session, on the loop and in transcription callbacks"""
+
+    def __init__(self):
+        self.enabled = False
+        self.sessions: Dict[str, float] = {}
+        # Transcription callbacks charge their time from the SDK's thread
+        self._lock = threading.Lock()
+
+    def begin(self, label: str):
+        if self.enabled:
+            self.sessions[label] = 0.0
+
+    def add(self, label: str, seconds: float):
+        # Tasks that outlive their session must not resurrect its entry
+        with self._lock:
+            if label in self.sessions:
+                self.sessions[label] += seconds
+
+    @contextlib.contextmanager
+    def measure(self, label: str):
+        """Account synchronous work done directly in a handler (no-op when diagnostics are off)"""
+        if not self.enabled:
+            yield
+            return
+        started = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(label, time.thread_time() - started)
+
+    def finish(self, label: str) -> Optional[float]:
+        with self._lock:
+            return self.sessions.pop(label, None)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {label: round(seconds * 1000, 1) for label, seconds in sorted(self.sessions.items(), key=lambda kv: -kv[1])}
+
+
+cpu_accounting = SessionCpuAccounting()
+
+
+class _MeteredCoroutine(collections.abc.Coroutine):
+    """Coroutine proxy that charges the CPU time of every step to a session"""
+
+    __slots__ = ("_coro", "_label")
+
+    def __init__(self, coro, label: str):
+        self._coro = coro
+        self._label = label
+
+    def send(self, value):
+        started = time.thread_time()
+        try:
+            return self._coro.send(value)
+        finally:
+            cpu_accounting.add(self._label, time.thread_time() - started)
+
+    def throw(self, typ, val=None, tb=None):
+        started = time.thread_time()
+        try:
+            if val is None and tb is None:
+                return self._coro.throw(typ)
+            return self._coro.throw(typ, val, tb)
+        finally:
+            cpu_accounting.add(self._label, time.thread_time() - started)
+
+    def close(self):
+        return self._coro.close()
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+    def __repr__(self):
+        return repr(self._coro)
+
+
+def _metered_task_factory(loop, coro, **kwargs):
+    label = current_session.get()
+    if label is not None:
+        coro = _MeteredCoroutine(coro, label)
+    return asyncio.Task(coro, loop=loop, **kwargs)
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag and logs the loop thread's stack while it is blocked.
+
+    A heartbeat task on the loop stamps the time every ``interval``; a daemon
+    watchdog thread notices when the stamp is older than ``threshold`` and
+    captures what the loop thread is executing at that moment.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.25):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = LatencyTracker(1200)
+        self.slow_callbacks = 0
+        self.max_lag = 0.0
+        self._beat = time.perf_counter()
+        self._reported_beat = None
+        self._loop_thread_id = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        threading.Thread(target=self._watchdog, name="loop-lag-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            beat = self._beat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - beat - self.interval)
+            self.lag.add(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if self._reported_beat == beat:
+                # The watchdog only saw the start of the block; report how long it really lasted
+                logging.warning(f"🐢 Event loop was blocked for {lag * 1000:.0f} ms in total")
+
+    def _watchdog(self):
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            stalled = time.perf_counter() - beat
+            if stalled < self.threshold or self._reported_beat == beat:
+                continue
+            self._reported_beat = beat
+            self.slow_callbacks += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<no frame>"
+            logging.warning(f"🐢 Event loop blocked for ≥ {stalled * 1000:.0f} ms so far, loop thread is at:\n{stack}")
+
+    def snapshot(self) -> dict:
+        return {
+            "samples": len(self.lag),
+            "slow_callbacks": self.slow_callbacks,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            **self.lag.summary((0.5, 0.99), unit="lag_ms", digits=2),
+        }
+
+
+lag_monitor: Optional[LoopLagMonitor] = None
+
+
+def install(interval: float, threshold: float):
+    """Turn on continuous diagnostics for the running loop"""
+    global lag_monitor
+    loop = asyncio.get_running_loop()
+    loop.set_task_factory(_metered_task_factory)
+    cpu_accounting.enabled = True
+    lag_monitor = LoopLagMonitor(interval=interval, threshold=threshold)
+    lag_monitor.start()
+    logging.info(f"🩺 Diagnostics enabled: loop lag threshold {threshold * 1000:.0f} ms, per-session CPU accounting on")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_profile(seconds: float, interval: float) -> str:
+    """Sample every thread's stack for ``seconds`` and return flamegraph collapsed stacks.
+
+    Blocking; run it in an executor so the loop keeps serving while it samples.
+    """
+    me = threading.get_ident()
+    counts: Counter = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, f"thread-{thread_id}"))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from async_utils import discard
+from metrics import LatencyTracker
+
+T = TypeVar("T")
+
+
+class HedgeBudget:
+    """Token bucket capping hedges to ``ratio`` of all requests"""
+
+    def __init__(self, ratio: float = 0.1, burst: float = 3.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = 1.0
+
+    def earn(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class HedgePolicy:
+    """Issue a duplicate request when the first one is slower than the recent ``percentile``"""
+
+    def __init__(
+        self,
+        percentile: float = 0.9,
+        min_delay: float = 0.8,
+        max_delay: float = 4.0,
+        default_delay: float = 2.0,
+        min_samples: int = 20,
+        budget_ratio: float = 0.1,
+        window: int = 200,
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker(window)
+        self.budget = HedgeBudget(budget_ratio)
+        self.metrics = {
+            "requests": 0,
+            "hedges_triggered": 0,
+            "hedges_skipped_budget": 0,
+            "hedge_wins": 0,
+            "primary_wins": 0,
+            "failures": 0,
+            "abandoned": 0,
+        }
+
+    def hedge_delay(self) -> float:
+        if len(self.latencies) < self.min_samples:
+            return self.default_delay
+        return min(self.max_delay, max(self.min_delay, self.latencies.percentile(self.percentile)))
+
+    def snapshot(self) -> dict:
+        requests = self.metrics["requests"]
+        p50 = self.latencies.percentile(0.5)
+        p90 = self.latencies.percentile(0.9)
+        return {
+            **self.metrics,
+            "hedge_rate": round(self.metrics["hedges_triggered"] / requests, 3) if requests else 0.0,
+            "hedge_delay_ms": round(self.hedge_delay() * 1000),
+            "first_token_p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "first_token_p90_ms": round(p90 * 1000) if p90 is not None else None,
+        }
+
+    async def first_of(
+        self,
+        primary: Callable[[], Awaitable[T]],
+        hedge: Optional[Callable[[], Awaitable[T]]] = None,
+        speculative: bool = False,
+    ) -> T:
+        """Return the first successful result of ``primary`` or its hedge.
+
+        ``speculative`` requests race something else (a skill) and are expected
+        to be thrown away; discarding one is not counted as abandoned.
+        """
+        started = time.perf_counter()
+
+        primary_task = asyncio.ensure_future(primary())
+        # Only a first token that actually arrived is a latency sample; a request
+        # cancelled from outside (skill won, barge-in) says nothing about Gemini
+        primary_task.add_done_callback(
+            lambda t: self.latencies.add(time.perf_counter() - started)
+            if not t.cancelled() and t.exception() is None else None
+        )
+        hedge_task = None
+        try:
+            delay = self.hedge_delay()
+            done, _ = await asyncio.wait({primary_task}, timeout=delay)
+            if not done and hedge is not None:
+                if self.budget.try_spend():
+                    self.metrics["hedges_triggered"] += 1
+                    logging.info(f"🪁 No first token after {delay * 1000:.0f} ms, hedging Gemini request")
+                    hedge_task = asyncio.ensure_future(hedge())
+                else:
+                    self.metrics["hedges_skipped_budget"] += 1
+
+            pending = {primary_task} if hedge_task is None else {primary_task, hedge_task}
+            first_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        first_error = first_error or task.exception()
+                        continue
+                    for loser in pending:
+                        discard(loser)
+                    self.metrics["requests"] += 1
+                    self.budget.earn()
+                    if task is hedge_task:
+                        self.metrics["hedge_wins"] += 1
+                        # The primary was at least this slow: keep it as a censored sample
+                        self.latencies.add(time.perf_counter() - started)
+                        logging.info(f"🪁 Hedged request won after {(time.perf_counter() - started) * 1000:.0f} ms")
+                    else:
+                        self.metrics["primary_wins"] += 1
+                    return task.result()
+            self.metrics["requests"] += 1
+            self.budget.earn()
+            self.metrics["failures"] += 1
+            raise first_error
+        except asyncio.CancelledError:
+            if not speculative:
+                self.metrics["abandoned"] += 1
+            discard(primary_task)
+            discard(hedge_task)
+            raise
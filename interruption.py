@@ -0,0 +1,218 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from metrics import LatencyTracker
+
+
+class InterruptionStats:
+    """Barge-in teardown latency on the server and until the client reports silence"""
+
+    def __init__(self, window: int = 500):
+        self.interruptions = 0
+        self.dropped_messages = 0
+        self.server = LatencyTracker(window)
+        self.client = LatencyTracker(window)
+
+    def snapshot(self) -> dict:
+        def summary(tracker: LatencyTracker) -> dict:
+            return {"samples": len(tracker), **tracker.summary(digits=1)}
+        return {
+            "interruptions": self.interruptions,
+            "dropped_stale_messages": self.dropped_messages,
+            "interrupt_to_server_silence": summary(self.server),
+            "interrupt_to_client_silence": summary(self.client),
+        }
+
+
+interruption_stats = InterruptionStats()
+
+
+class OutboundQueue:
+    """Single writer for a client socket that drops messages of interrupted turns.
+
+    Every message to the client goes through here, session-level ones
+    (status, pong, errors) included, so they keep their order relative to
+    queued turn output.
+    """
+
+    def __init__(self, websocket, stats: InterruptionStats = interruption_stats):
+        self.websocket = websocket
+        self.stats = stats
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._stale_before = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._drain())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+
+    def put(self, text: str, turn_id: Optional[int] = None, on_sent: Optional[Callable[[], None]] = None,
+            delivered: Optional[asyncio.Future] = None):
+        self._queue.put_nowait((turn_id, text, on_sent, delivered))
+
+    async def send_text(self, text: str):
+        """Queue a session-level message that belongs to no turn"""
+        self.put(text)
+
+    async def deliver(self, text: str, timeout: float = 10.0) -> bool:
+        """Queue ``text`` and wait until it is written; False when the socket is gone"""
+        delivered = asyncio.get_running_loop().create_future()
+        self.put(text, delivered=delivered)
+        try:
+            return await asyncio.wait_for(delivered, timeout)
+        except asyncio.TimeoutError:
+            return False
+
+    def drop_turns_before(self, turn_id: int) -> int:
+        """Mark every turn below ``turn_id`` stale and purge what they already queued"""
+        self._stale_before = max(self._stale_before, turn_id)
+        kept, dropped = [], 0
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if self._is_stale(item[0]):
+                dropped += 1
+            else:
+                kept.append(item)
+        for item in kept:
+            self._queue.put_nowait(item)
+        self.stats.dropped_messages += dropped
+        return dropped
+
+    def _is_stale(self, turn_id: Optional[int]) -> bool:
+        return turn_id is not None and turn_id < self._stale_before
+
+    async def _drain(self):
+        while True:
+            turn_id, text, on_sent, delivered = await self._queue.get()
+            if self._is_stale(turn_id):
+                self.stats.dropped_messages += 1
+                continue
+            try:
+                await self.websocket.send_text(text)
+            except Exception as e:
+                logging.warning(f"Client connection closed, could not send message: {e}")
+                if delivered and not delivered.done():
+                    delivered.set_result(False)
+                continue
+            if on_sent:
+                on_sent()
+            if delivered and not delivered.done():
+                delivered.set_result(True)
+
+
+class TurnSender:
+    """What the voice pipeline sees as the client socket for one turn"""
+
+    def __init__(self, outbound: OutboundQueue, turn_id: int):
+        self.outbound = outbound
+        self.turn_id = turn_id
+
+    async def send_text(self, text: str):
+        self.outbound.put(text, self.turn_id)
+
+
+@dataclass
+class TurnResources:
+    """Everything a response turn holds open upstream and downstream"""
+    turn_id: int
+    user_turn_order: Optional[int]
+    sender: TurnSender
+    task: Optional[asyncio.Task] = None
+    cleanups: List[Callable[[], None]] = field(default_factory=list)
+
+    def add_cleanup(self, cleanup: Callable[[], None]):
+        self.cleanups.append(cleanup)
+
+    def release(self):
+        for cleanup in self.cleanups:
+            try:
+                cleanup()
+            except Exception as e:
+                logging.debug(f"Turn {self.turn_id} cleanup failed: {e}")
+        self.cleanups.clear()
+
+
+class InterruptionController:
+    """Owns the active response turn of a session and tears it down on barge-in.
+
+    Must be called from the event loop; AssemblyAI callbacks reach it
+    through ``loop.call_soon_threadsafe``.
+    """
+
+    def __init__(self, outbound: OutboundQueue, stats: InterruptionStats = interruption_stats):
+        self.outbound = outbound
+        self.stats = stats
+        self.active: Optional[TurnResources] = None
+        # Last turn that finished generating; its audio may still be playing on the client
+        self.finished: Optional[TurnResources] = None
+        self._next_turn_id = 1
+        self._awaiting_ack: Dict[int, float] = {}
+
+    def start_turn(self, user_turn_order: Optional[int], pipeline: Callable[[TurnResources], Awaitable]) -> TurnResources:
+        self.interrupt()
+        turn = TurnResources(
+            turn_id=self._next_turn_id,
+            user_turn_order=user_turn_order,
+            sender=TurnSender(self.outbound, self._next_turn_id),
+        )
+        self._next_turn_id += 1
+        turn.task = asyncio.create_task(pipeline(turn))
+        turn.task.add_done_callback(lambda _: self._on_turn_done(turn))
+        self.active = turn
+        return turn
+
+    def _on_turn_done(self, turn: TurnResources):
+        # A normal turn change must not look like a barge-in to the client
+        if self.active is turn:
+            self.active = None
+            self.finished = turn
+
+    def barge_in(self, user_turn_order: int, detected_at: float):
+        """User started a new utterance while the previous answer may still be playing"""
+        turn = self.active or self.finished
+        if turn and turn.user_turn_order != user_turn_order:
+            logging.info(f"🛑 Barge-in on turn {turn.turn_id}, stopping response.")
+            self._tear_down(turn, detected_at)
+
+    def interrupt(self, detected_at: Optional[float] = None) -> bool:
+        """Stop the turn that is still generating, if any"""
+        if self.active is None:
+            return False
+        self._tear_down(self.active, detected_at)
+        return True
+
+    def _tear_down(self, turn: TurnResources, detected_at: Optional[float]):
+        if self.active is turn:
+            self.active = None
+        if self.finished is turn:
+            self.finished = None
+        started = detected_at or time.perf_counter()
+        was_running = turn.task is not None and not turn.task.done()
+
+        if was_running:
+            turn.task.cancel()
+        turn.release()
+        # A finished turn may still have audio waiting in the queue
+        was_running = self.outbound.drop_turns_before(turn.turn_id + 1) > 0 or was_running
+
+        def on_sent():
+            if was_running:
+                self.stats.server.add(time.perf_counter() - started)
+
+        self.outbound.put(json.dumps({"type": "audio_interrupt", "turn_id": turn.turn_id}), on_sent=on_sent)
+        if was_running:
+            self.stats.interruptions += 1
+        self._awaiting_ack = {t: s for t, s in self._awaiting_ack.items() if t > turn.turn_id - 8}
+        self._awaiting_ack[turn.turn_id] = started
+
+    def on_interrupt_ack(self, turn_id: int, was_playing: bool):
+        started = self._awaiting_ack.pop(turn_id, None)
+        if started is not None and was_playing:
+            self.stats.client.add(time.perf_counter() - started)
@@ -1,9 +1,8 @@
 import os
 from dotenv import load_dotenv
 import logging
-from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from pathlib import Path as PathLib
 import json
 import asyncio
@@ -13,6 +12,10 @@ import base64
 import websockets
 from datetime import datetime
 import re
+import time
+import secrets
+import contextvars
+from contextlib import asynccontextmanager
 
 import assemblyai as aai
 from assemblyai.streaming.v3 import (
@@ -22,18 +25,44 @@ from assemblyai.streaming.v3 import (
     StreamingError,
     StreamingEvents,
     StreamingParameters,
+    StreamingSessionParameters,
     TerminationEvent,
     TurnEvent,
 )
 import google.generativeai as genai
 import httpx
 
+from skills import Skill, SkillEngine, SkillResult
+from web_search import TavilySearch
+from hedging import HedgePolicy
+from turn_taking import new_turn_controller, turn_latency_report
+from batch import AudioStore, BatchCollector, batch_stats, run_batch
+from schemas import BatchQueryRequest, ErrorResponse, LLMQueryResponse
+from interruption import InterruptionController, OutboundQueue, TurnResources, interruption_stats
+from session_store import SessionState, create_session_store, new_session_id
+from assets import AssetPipeline
+import diagnostics
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.DIAGNOSTICS:
+        diagnostics.install(interval=0.05, threshold=config.LOOP_LAG_THRESHOLD_MS / 1000)
+    yield
+    # Close pooled clients
+    await web_search.aclose()
+    await session_store.close()
+    if diagnostics.lag_monitor:
+        diagnostics.lag_monitor.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 BASE_DIR = PathLib(__file__).resolve().parent
-app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
+# The landing page has no dynamic content: render it and fingerprint/compress assets once
+assets = AssetPipeline(BASE_DIR / "static", BASE_DIR / "templates").build()
 
 # Global variables to store API keys (will be updated per session)
 current_api_keys = {
@@ -43,23 +72,25 @@ current_api_keys = {
     "tavily": config.TAVILY_API_KEY
 }
 
+GEMINI_MODEL = 'gemini-1.5-flash'
+
 # Initialize Gemini model with default key if available
 if config.GEMINI_API_KEY:
     genai.configure(api_key=config.GEMINI_API_KEY)
-    gemini_model = genai.GenerativeModel('gemini-1.5-flash')
+    gemini_model = genai.GenerativeModel(GEMINI_MODEL)
 else:
     gemini_model = None
     logging.warning("Gemini model not initialized. GEMINI_API_KEY is missing.")
 
 
-def get_gemini_model(api_key: str = None):
+def get_gemini_model(api_key: str = None, model_name: str = GEMINI_MODEL):
     """Get or create Gemini model with the provided API key"""
     try:
         if api_key:
             genai.configure(api_key=api_key)
-            return genai.GenerativeModel('gemini-1.5-flash')
+            return genai.GenerativeModel(model_name)
         elif gemini_model:
-            return gemini_model
+            return gemini_model if model_name == GEMINI_MODEL else genai.GenerativeModel(model_name)
         else:
             return None
     except Exception as e:
@@ -81,6 +112,32 @@ def _detect_weather_intent(user_text: str) -> Optional[str]:
     return None
 
 
+SEARCH_FRESHNESS_CUE = r"\b(?:today|tonight|this week|right now|currently|latest|recent)\b"
+SEARCH_FACT_CUE = r"\b(?:news|headlines?|scores?|results?|prices?|stocks?|exchange rates?|elections?|released?)\b"
+
+
+def _detect_search_intent(user_text: str) -> Optional[str]:
+    """Detect questions that need fresh web data and return the search query"""
+    if not user_text:
+        return None
+    text = user_text.lower().strip().rstrip("?.!")
+    patterns = [
+        r"^(?:please\s+)?(?:search|google|look\s+up)\s+(?:the\s+web\s+|online\s+)?(?:for\s+)?(.+)$",
+        r"^what(?:'s| is| are)\s+the\s+latest\s+(?:news\s+)?(?:on|about|with|in)\s+(.+)$",
+        r"^(?:any\s+)?(?:latest|recent|today's)\s+news\s+(?:on|about|in)\s+(.+)$",
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, text)
+        if match:
+            query = match.group(1).strip()
+            return query if len(query) > 2 else None
+    # A freshness word alone ("how are you today?") is small talk; only search when
+    # it comes with an explicit news/fact cue ("stock price of apple today")
+    if re.search(SEARCH_FRESHNESS_CUE, text) and re.search(SEARCH_FACT_CUE, text):
+        return text
+    return None
+
+
 def _detect_website_intent(user_text: str) -> Optional[str]:
     """Detect if user wants to open a website and extract the website name/URL"""
     if not user_text:
@@ -266,12 +323,19 @@ def _weather_code_description(code: int) -> str:
     return mapping.get(int(code), "")
 
 
-def _fetch_weather_sync(location: str) -> Optional[str]:
+def _fetch_weather_sync(location: str, budget: float = 4.0) -> Optional[str]:
+    # Both lookups share one budget so the executor thread is done when the skill's deadline passes
+    deadline = time.monotonic() + budget
+
+    def remaining() -> float:
+        return max(0.05, deadline - time.monotonic())
+
     try:
-        with httpx.Client(timeout=4.0) as client:
+        with httpx.Client() as client:
             geo = client.get(
                 "https://geocoding-api.open-meteo.com/v1/search",
                 params={"name": location, "count": 1, "language": "en", "format": "json"},
+                timeout=remaining(),
             ).json()
             results = (geo or {}).get("results") or []
             if not results:
@@ -291,6 +355,7 @@ def _fetch_weather_sync(location: str) -> Optional[str]:
                     "temperature_unit": "celsius",
                     "wind_speed_unit": "kmh",
                 },
+                timeout=remaining(),
             ).json()
             current = (wx or {}).get("current") or {}
             t = current.get("temperature_2m")
@@ -317,19 +382,261 @@ def _fetch_weather_sync(location: str) -> Optional[str]:
         return None
 
 
-async def get_llm_response_stream(transcript: str, client_websocket: WebSocket, chat_history: List[dict], session_api_keys: dict):
+async def _run_website_skill(website: str, api_keys: dict) -> Optional[SkillResult]:
+    url = _normalize_website_url(website)
+    if url:
+        logging.info(f"🌐 Normalized URL: {url}")
+        return SkillResult(
+            text=f"Opening {website} for you.",
+            speak=False,
+            messages=[{"type": "open_url", "url": url, "website_name": website}],
+        )
+    search_url = f'https://www.google.com/search?q={website.replace(" ", "+")}'
+    return SkillResult(
+        text=f"I couldn't find the website '{website}'. Let me search for it instead.",
+        speak=False,
+        messages=[{"type": "open_url", "url": search_url, "website_name": f"Search for {website}"}],
+    )
+
+
+async def _run_weather_skill(location: str, api_keys: dict) -> Optional[SkillResult]:
+    loop = asyncio.get_running_loop()
+    weather_text = await loop.run_in_executor(None, _fetch_weather_sync, location, config.WEATHER_SKILL_DEADLINE)
+    return SkillResult(text=weather_text) if weather_text else None
+
+
+web_search = TavilySearch(
+    base_url=config.TAVILY_API_URL,
+    budget=config.SEARCH_SKILL_DEADLINE,
+    cache_ttl=config.SEARCH_CACHE_TTL,
+)
+
+
+async def _run_search_skill(query: str, api_keys: dict) -> Optional[SkillResult]:
+    digest = await web_search.search(query, api_keys["tavily"])
+    return SkillResult(context=digest) if digest else None
+
+
+skill_engine = SkillEngine([
+    Skill(
+        name="website",
+        detect=_detect_website_intent,
+        run=_run_website_skill,
+        deadline=1.0,
+        race_llm=False,
+        speaks=False,
+        status_message="Opening website...",
+    ),
+    Skill(
+        name="weather",
+        detect=_detect_weather_intent,
+        run=_run_weather_skill,
+        deadline=config.WEATHER_SKILL_DEADLINE,
+        grace=config.SKILL_LLM_GRACE,
+        status_message="Checking weather...",
+    ),
+    Skill(
+        name="search",
+        detect=_detect_search_intent,
+        run=_run_search_skill,
+        deadline=config.SEARCH_SKILL_DEADLINE,
+        race_llm=False,
+        status_message="Searching the web...",
+        requires_key="tavily",
+    ),
+])
+
+
+gemini_hedger = HedgePolicy(
+    percentile=config.GEMINI_HEDGE_PERCENTILE,
+    min_delay=config.GEMINI_HEDGE_MIN_DELAY,
+    max_delay=config.GEMINI_HEDGE_MAX_DELAY,
+    budget_ratio=config.GEMINI_HEDGE_BUDGET,
+)
+
+
+class GeminiStream:
+    """Gemini response stream primed with its first chunk; ``close`` stops it upstream"""
+
+    def __init__(self, response):
+        self._response = response
+        self._chunks = iter(response)
+        self._first_chunk = next(self._chunks, None)
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed:
+            raise StopIteration
+        if self._first_chunk is not None:
+            chunk, self._first_chunk = self._first_chunk, None
+            return chunk
+        return next(self._chunks)
+
+    def close(self):
+        """Best effort: cancel the underlying gRPC call or close the REST generator"""
+        if self.closed:
+            return
+        self.closed = True
+        upstream = getattr(self._response, "_iterator", None)
+        for name in ("cancel", "close"):
+            method = getattr(upstream, name, None)
+            if callable(method):
+                try:
+                    method()
+                except Exception as e:
+                    logging.debug(f"Could not close Gemini stream: {e}")
+                return
+
+
+def _start_gemini_stream(chat, prompt: str) -> GeminiStream:
+    """Send the prompt and block until the first chunk arrives (runs in an executor)"""
+    return GeminiStream(chat.send_message(prompt, stream=True))
+
+
+async def _open_gemini_stream(chat, prompt: str) -> GeminiStream:
+    future = asyncio.get_running_loop().run_in_executor(None, _start_gemini_stream, chat, prompt)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        # The executor thread cannot be interrupted; close the stream as soon as it lands
+        future.add_done_callback(lambda f: f.cancelled() or f.exception() or f.result().close())
+        raise
+
+
+ASTRA_PROMPT = """You are Astra, an AI assistant.
+
+PERSONA:
+- You are a AI assistant
+- Confident, calm, and subtly futuristic tone
+
+RESPONSE RULES:
+- Keep responses SHORT and conversational (voice responses should be brief)
+- If asked your name/who you are: "I am Astra, your AI assistant."
+- Focus on being helpful and direct
+- No markdown, plain text only
+
+{grounding}User said: "{transcript}"
+"""
+
+
+def _build_prompt(transcript: str, web_context: Optional[str] = None) -> str:
+    grounding = ""
+    if web_context:
+        grounding = f"""WEB RESULTS (fresh, use them if relevant and answer in your own words):
+{web_context}
+
+"""
+    return ASTRA_PROMPT.format(grounding=grounding, transcript=transcript)
+
+
+async def _open_murf_stream(murf_key: str):
+    """Connect to Murf streaming TTS and send the voice config"""
+    murf_uri = f"wss://api.murf.ai/v1/speech/stream-input?api-key={murf_key}&sample_rate=44100&channel_type=MONO&format=MP3"
+    websocket = await websockets.connect(murf_uri, open_timeout=10)
+    voice_id = "en-US-natalie"
+    context_id = f"voice-agent-context-{datetime.now().isoformat()}"
+    try:
+        await websocket.send(json.dumps({
+            "voice_config": {"voiceId": voice_id, "style": "Conversational"},
+            "context_id": context_id
+        }))
+    except Exception:
+        await websocket.close()
+        raise
+    logging.info(f"Successfully connected to Murf AI, using voice: {voice_id}")
+    return websocket, context_id
+
+
+async def _close_murf_stream(murf_task: Optional[asyncio.Task]):
+    """Close the Murf connection, or abandon it if it is still being opened"""
+    if murf_task is None:
+        return
+    if not murf_task.done():
+        murf_task.cancel()
+        murf_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return
+    if murf_task.cancelled() or murf_task.exception():
+        return
+    websocket, _ = murf_task.result()
+    try:
+        await websocket.close()
+    except Exception as e:
+        logging.debug(f"Error closing Murf connection: {e}")
+
+
+async def _forward_murf_audio(websocket, client_websocket: WebSocket, timeout: float = 30.0, turn_id: Optional[int] = None):
+    first_audio_chunk_received = False
+    try:
+        while True:
+            response_str = await asyncio.wait_for(websocket.recv(), timeout=timeout)
+            response = json.loads(response_str)
+
+            if "audio" in response and response['audio']:
+                if not first_audio_chunk_received:
+                    await client_websocket.send_text(json.dumps({"type": "audio_start", "turn_id": turn_id}))
+                    first_audio_chunk_received = True
+                    logging.info("✅ Streaming first audio chunk to client.")
+
+                await client_websocket.send_text(
+                    json.dumps({"type": "audio", "data": response['audio'], "turn_id": turn_id})
+                )
+
+            if response.get("final"):
+                logging.info("Murf confirms final audio chunk received. Sending audio_end to client.")
+                await client_websocket.send_text(json.dumps({"type": "audio_end", "turn_id": turn_id}))
+                break
+    except asyncio.TimeoutError:
+        logging.warning("Murf TTS timeout in receiver")
+        await client_websocket.send_text(json.dumps({"type": "audio_end", "turn_id": turn_id}))
+    except websockets.ConnectionClosed:
+        logging.warning("Murf connection closed unexpectedly.")
+        await client_websocket.send_text(json.dumps({"type": "audio_end", "turn_id": turn_id}))
+    except Exception as e:
+        logging.error(f"Error in Murf receiver task: {e}")
+        await client_websocket.send_text(json.dumps({"type": "audio_end", "turn_id": turn_id}))
+
+
+async def _deliver_skill_result(result: SkillResult, murf_task: Optional[asyncio.Task], client_websocket: WebSocket, turn_id: Optional[int] = None):
+    # Send to UI as if LLM chunk
+    await client_websocket.send_text(json.dumps({"type": "llm_chunk", "data": result.text, "turn_id": turn_id}))
+    for message in result.messages:
+        await client_websocket.send_text(json.dumps(message))
+
+    if not result.speak or murf_task is None:
+        return
+
+    try:
+        websocket, context_id = await murf_task
+        await websocket.send(json.dumps({
+            "text": result.text,
+            "end": True,
+            "context_id": context_id
+        }))
+        await _forward_murf_audio(websocket, client_websocket, timeout=5.0, turn_id=turn_id)
+    except Exception as e:
+        logging.error(f"Skill TTS failed: {e}")
+        # Still complete the skill response without TTS
+        await client_websocket.send_text(json.dumps({"type": "audio_end", "turn_id": turn_id}))
+
+
+async def get_llm_response_stream(transcript: str, client_websocket: WebSocket, chat_history: List[dict], session_api_keys: dict,
+                                  turn: Optional[TurnResources] = None):
     if not transcript or not transcript.strip():
         return
 
     # Use session API keys if provided, otherwise fall back to defaults
     gemini_key = session_api_keys.get('gemini') or current_api_keys['gemini']
     murf_key = session_api_keys.get('murf') or current_api_keys['murf']
-    
+    skill_keys = {"tavily": session_api_keys.get('tavily') or current_api_keys['tavily']}
+
     session_gemini_model = get_gemini_model(gemini_key)
     if not session_gemini_model:
         logging.error("Cannot get LLM response because Gemini model is not initialized.")
         await client_websocket.send_text(json.dumps({
-            "type": "error", 
+            "type": "error",
             "message": "Gemini API key is missing or invalid. Please configure it in the settings."
         }))
         return
@@ -337,279 +644,281 @@ async def get_llm_response_stream(transcript: str, client_websocket: WebSocket,
     if not murf_key:
         logging.error("Murf API key is missing.")
         await client_websocket.send_text(json.dumps({
-            "type": "error", 
+            "type": "error",
             "message": "Murf API key is missing. Please configure it in the settings."
         }))
         return
 
-    # Check for special skills FIRST, before connecting to any external services
-    
-    # Website opening skill: detect and handle directly
-    website_intent = _detect_website_intent(transcript)
-    if website_intent:
-        logging.info(f"🌐 Website intent detected: '{website_intent}' - Processing directly without Gemini")
-        await client_websocket.send_text(json.dumps({"type": "status", "message": "Opening website..."}))
-        url = _normalize_website_url(website_intent)
-        
-        if url:
-            logging.info(f"🌐 Normalized URL: {url}")
-            # Send to UI as if LLM chunk first
-            response_text = f"Opening {website_intent} for you."
-            await client_websocket.send_text(json.dumps({"type": "llm_chunk", "data": response_text}))
-            
-            # Send website opening command to client
-            await client_websocket.send_text(json.dumps({
-                "type": "open_url", 
-                "url": url,
-                "website_name": website_intent
-            }))
-            logging.info(f"🌐 Sent open_url command to client: {url}")
-            
-            # Add to chat history and return early (no TTS for website opening)
-            chat_history.append({"role": "model", "parts": [response_text]})
-            logging.info("Website opening command completed - no TTS needed.")
-            return
-        else:
-            response_text = f"I couldn't find the website '{website_intent}'. Let me search for it instead."
-            await client_websocket.send_text(json.dumps({"type": "llm_chunk", "data": response_text}))
-            search_url = f'https://www.google.com/search?q={website_intent.replace(" ", "+")}'
-            await client_websocket.send_text(json.dumps({
-                "type": "open_url", 
-                "url": search_url,
-                "website_name": f"Search for {website_intent}"
-            }))
-            chat_history.append({"role": "model", "parts": [response_text]})
-            return
+    # Skill detection is a cheap regex pass; everything after it runs concurrently
+    matched = skill_engine.match(transcript, skill_keys)
+    skill, skill_arg = matched if matched else (None, None)
 
-    # Weather skill: detect and answer directly with TTS
-    location = _detect_weather_intent(transcript)
-    if location:
-        await client_websocket.send_text(json.dumps({"type": "status", "message": "Checking weather..."}))
-        loop = asyncio.get_running_loop()
-        weather_text = None
-        try:
-            weather_text = await asyncio.wait_for(
-                loop.run_in_executor(None, _fetch_weather_sync, location),
-                timeout=5.0,
-            )
-        except Exception as e:
-            logging.warning(f"Weather lookup timeout/error: {e}")
-            weather_text = None
+    loop = asyncio.get_running_loop()
+    turn_id = turn.turn_id if turn else None
+    prompt = _build_prompt(transcript)
+    history = list(chat_history)
 
-        if weather_text:
-            # Send to UI as if LLM chunk
-            await client_websocket.send_text(json.dumps({"type": "llm_chunk", "data": weather_text}))
-            
-            # Send to TTS (Fixed: Add proper TTS handling)
-            try:
-                murf_uri = f"wss://api.murf.ai/v1/speech/stream-input?api-key={murf_key}&sample_rate=44100&channel_type=MONO&format=MP3"
-                # FIXED: Changed `timeout` to `open_timeout`
-                async with websockets.connect(murf_uri, open_timeout=10) as websocket:
-                    voice_id = "en-US-natalie"
-                    context_id = f"voice-agent-context-{datetime.now().isoformat()}"
-                    
-                    # Send config
-                    config_msg = {
-                        "voice_config": {"voiceId": voice_id, "style": "Conversational"},
-                        "context_id": context_id
-                    }
-                    await websocket.send(json.dumps(config_msg))
-                    
-                    # Send text and end signal
-                    await websocket.send(json.dumps({
-                        "text": weather_text, 
-                        "end": True, 
-                        "context_id": context_id
-                    }))
-                    
-                    # Signal audio start to client
-                    await client_websocket.send_text(json.dumps({"type": "audio_start"}))
-                    
-                    # Stream audio to client
-                    first_audio_received = False
-                    while True:
-                        try:
-                            response_str = await asyncio.wait_for(websocket.recv(), timeout=5.0)
-                            response = json.loads(response_str)
-
-                            if "audio" in response and response['audio']:
-                                if not first_audio_received:
-                                    logging.info("✅ First audio chunk for weather response")
-                                    first_audio_received = True
-
-                                await client_websocket.send_text(
-                                    json.dumps({"type": "audio", "data": response['audio']})
-                                )
-
-                            if response.get("final"):
-                                logging.info("Weather TTS completed")
-                                await client_websocket.send_text(json.dumps({"type": "audio_end"}))
-                                break
-                        except asyncio.TimeoutError:
-                            logging.warning("Weather TTS timeout")
-                            break
-                        except websockets.ConnectionClosed:
-                            logging.warning("Weather TTS connection closed")
-                            break
-                            
-            except Exception as e:
-                logging.error(f"Weather TTS failed: {e}")
-                # Still complete the weather response without TTS
-                await client_websocket.send_text(json.dumps({"type": "audio_end"}))
-            
-            chat_history.append({"role": "model", "parts": [weather_text]})
-            logging.info("Weather response completed.")
-            return
+    def start_gemini(speculative: bool = False):
+        turn_prompt = prompt
+
+        def primary():
+            chat = session_gemini_model.start_chat(history=history)
+            return _open_gemini_stream(chat, turn_prompt)
+
+        def hedge():
+            hedge_model = get_gemini_model(gemini_key, config.GEMINI_HEDGE_MODEL or GEMINI_MODEL) or session_gemini_model
+            chat = hedge_model.start_chat(history=history)
+            return _open_gemini_stream(chat, turn_prompt)
 
-    # If no special skills matched, proceed with normal Gemini processing
-    logging.info(f"No special skills matched, sending to Gemini: '{transcript}'")
+        return asyncio.ensure_future(
+            gemini_hedger.first_of(primary, hedge if config.GEMINI_HEDGING else None, speculative=speculative)
+        )
 
-    # Fixed: Improved TTS connection handling
+    murf_task = None
+    gemini_future = None
+    gemini_response_stream = None
     try:
-        murf_uri = f"wss://api.murf.ai/v1/speech/stream-input?api-key={murf_key}&sample_rate=44100&channel_type=MONO&format=MP3"
-        
-        # FIXED: Changed `timeout` to `open_timeout`
-        async with websockets.connect(murf_uri, open_timeout=10) as websocket:
-            voice_id = "en-US-natalie"
-            logging.info(f"Successfully connected to Murf AI, using voice: {voice_id}")
-            
-            context_id = f"voice-agent-context-{datetime.now().isoformat()}"
-            
-            config_msg = {
-                "voice_config": {"voiceId": voice_id, "style": "Conversational"},
-                "context_id": context_id
-            }
-            await websocket.send(json.dumps(config_msg))
-
-            async def receive_and_forward_audio():
-                first_audio_chunk_received = False
-                try:
-                    while True:
-                        response_str = await asyncio.wait_for(websocket.recv(), timeout=30.0)
-                        response = json.loads(response_str)
-
-                        if "audio" in response and response['audio']:
-                            if not first_audio_chunk_received:
-                                await client_websocket.send_text(json.dumps({"type": "audio_start"}))
-                                first_audio_chunk_received = True
-                                logging.info("✅ Streaming first audio chunk to client.")
-
-                            await client_websocket.send_text(
-                                json.dumps({"type": "audio", "data": response['audio']})
-                            )
-
-                        if response.get("final"):
-                            logging.info("Murf confirms final audio chunk received. Sending audio_end to client.")
-                            await client_websocket.send_text(json.dumps({"type": "audio_end"}))
-                            break
-                except asyncio.TimeoutError:
-                    logging.warning("Murf TTS timeout in receiver")
-                    await client_websocket.send_text(json.dumps({"type": "audio_end"}))
-                except websockets.ConnectionClosed:
-                    logging.warning("Murf connection closed unexpectedly.")
-                    await client_websocket.send_text(json.dumps({"type": "audio_end"}))
-                except Exception as e:
-                    logging.error(f"Error in Murf receiver task: {e}")
-                    await client_websocket.send_text(json.dumps({"type": "audio_end"}))
-            
-            receiver_task = asyncio.create_task(receive_and_forward_audio())
+        # Open Murf while the skill (and possibly Gemini) is still working
+        if not skill or skill.speaks or skill.race_llm:
+            murf_task = asyncio.create_task(_open_murf_stream(murf_key))
+            if turn:
+                turn.add_cleanup(lambda: asyncio.ensure_future(_close_murf_stream(murf_task)))
 
-            try:
-                # Fixed: Simplified and more focused prompt
-                prompt = f"""You are Astra, an AI assistant.
+        if skill:
+            logging.info(f"🎯 Skill '{skill.name}' matched with '{skill_arg}'")
+            if skill.status_message:
+                await client_websocket.send_text(json.dumps({"type": "status", "message": skill.status_message}))
+            # The fallback races the skill and is thrown away whenever the skill wins
+            outcome = await skill_engine.dispatch(skill, skill_arg, lambda: start_gemini(speculative=True), skill_keys)
+            if outcome.result and outcome.result.context:
+                # Grounding skill: answer with Gemini over the search digest
+                prompt = _build_prompt(transcript, outcome.result.context)
+                gemini_future = start_gemini()
+                logging.info(f"Skill '{skill.name}' grounded the Gemini prompt ({len(outcome.result.context)} chars)")
+            elif outcome.result:
+                await _deliver_skill_result(outcome.result, murf_task, client_websocket, turn_id)
+                chat_history.append({"role": "model", "parts": [outcome.result.text]})
+                logging.info(f"Skill '{skill.name}' response completed.")
+                return
+            else:
+                gemini_future = outcome.fallback
+                logging.info(f"Skill '{skill.name}' gave no answer, falling back to Gemini: '{transcript}'")
+        else:
+            logging.info(f"No special skills matched, sending to Gemini: '{transcript}'")
+            gemini_future = start_gemini()
 
-PERSONA:
-- You are a AI assistant
-- Confident, calm, and subtly futuristic tone
+        # The search digest only grounds this turn; history keeps the ungrounded prompt
+        chat_history.append({"role": "user", "parts": [_build_prompt(transcript)]})
 
-RESPONSE RULES:
-- Keep responses SHORT and conversational (voice responses should be brief)
-- If asked your name/who you are: "I am Astra, your AI assistant."
-- Focus on being helpful and direct
-- No markdown, plain text only
+        if murf_task is None:
+            murf_task = asyncio.create_task(_open_murf_stream(murf_key))
+            if turn:
+                turn.add_cleanup(lambda: asyncio.ensure_future(_close_murf_stream(murf_task)))
+        websocket, context_id = await murf_task
 
-User said: "{transcript}"
-"""
-                
-                chat_history.append({"role": "user", "parts": [prompt]})
-                
-                chat = session_gemini_model.start_chat(history=chat_history[:-1])
+        receiver_task = asyncio.create_task(_forward_murf_audio(websocket, client_websocket, turn_id=turn_id))
 
-                def generate_sync():
-                    return chat.send_message(prompt, stream=True)
+        try:
+            gemini_response_stream = await gemini_future
+            if turn:
+                turn.add_cleanup(gemini_response_stream.close)
 
-                loop = asyncio.get_running_loop()
-                gemini_response_stream = await loop.run_in_executor(None, generate_sync)
+            sentence_buffer = ""
+            full_response_text = ""
 
-                sentence_buffer = ""
-                full_response_text = ""
-                
-                for chunk in gemini_response_stream:
-                    if chunk.text:
-                        full_response_text += chunk.text
+            # Pull chunks in the executor so the loop (and cancellation) never waits on Gemini
+            while True:
+                chunk = await loop.run_in_executor(None, next, gemini_response_stream, None)
+                if chunk is None:
+                    break
+                if chunk.text:
+                    full_response_text += chunk.text
 
-                        await client_websocket.send_text(
-                            json.dumps({"type": "llm_chunk", "data": chunk.text})
-                        )
-                        
-                        sentence_buffer += chunk.text
-                        sentences = re.split(r'(?<=[.?!])\s+', sentence_buffer)
-                        
-                        if len(sentences) > 1:
-                            for sentence in sentences[:-1]:
-                                if sentence.strip():
-                                    text_msg = {
-                                        "text": sentence.strip(), 
-                                        "end": False,
-                                        "context_id": context_id
-                                    }
-                                    await websocket.send(json.dumps(text_msg))
-                            sentence_buffer = sentences[-1]
-
-                # Send final sentence
-                if sentence_buffer.strip():
-                    text_msg = {
-                        "text": sentence_buffer.strip(), 
-                        "end": True,
-                        "context_id": context_id
-                    }
-                    await websocket.send(json.dumps(text_msg))
-                
-                chat_history.append({"role": "model", "parts": [full_response_text]})
+                    await client_websocket.send_text(
+                        json.dumps({"type": "llm_chunk", "data": chunk.text, "turn_id": turn_id})
+                    )
 
-                logging.info("Finished streaming to Murf. Waiting for final audio chunks...")
+                    sentence_buffer += chunk.text
+                    sentences = re.split(r'(?<=[.?!])\s+', sentence_buffer)
 
-                await asyncio.wait_for(receiver_task, timeout=30.0)
-                logging.info("Receiver task finished gracefully.")
-            
-            finally:
-                if not receiver_task.done():
-                    receiver_task.cancel()
-                    logging.info("Receiver task cancelled on exit.")
+                    if len(sentences) > 1:
+                        for sentence in sentences[:-1]:
+                            if sentence.strip():
+                                text_msg = {
+                                    "text": sentence.strip(),
+                                    "end": False,
+                                    "context_id": context_id
+                                }
+                                await websocket.send(json.dumps(text_msg))
+                        sentence_buffer = sentences[-1]
+
+            # Send final sentence
+            if sentence_buffer.strip():
+                text_msg = {
+                    "text": sentence_buffer.strip(),
+                    "end": True,
+                    "context_id": context_id
+                }
+                await websocket.send(json.dumps(text_msg))
+
+            chat_history.append({"role": "model", "parts": [full_response_text]})
+
+            logging.info("Finished streaming to Murf. Waiting for final audio chunks...")
+
+            await asyncio.wait_for(receiver_task, timeout=30.0)
+            logging.info("Receiver task finished gracefully.")
+
+        finally:
+            if not receiver_task.done():
+                receiver_task.cancel()
+                logging.info("Receiver task cancelled on exit.")
 
     except asyncio.TimeoutError:
         logging.error("TTS connection timeout")
         await client_websocket.send_text(json.dumps({
-            "type": "error", 
+            "type": "error",
             "message": "Text-to-speech service timeout. Please try again."
         }))
     except asyncio.CancelledError:
         logging.info("LLM/TTS task was cancelled by user interruption.")
-        await client_websocket.send_text(json.dumps({"type": "audio_interrupt"}))
+        await client_websocket.send_text(json.dumps({"type": "audio_interrupt", "turn_id": turn_id}))
     except Exception as e:
         logging.error(f"Error in LLM/TTS streaming function: {e}", exc_info=True)
         # Send error message to client
         await client_websocket.send_text(json.dumps({
-            "type": "error", 
+            "type": "error",
             "message": f"Failed to process your request: {str(e)}"
         }))
+    finally:
+        if gemini_future is not None and not gemini_future.done():
+            gemini_future.cancel()
+        if gemini_response_stream is not None:
+            gemini_response_stream.close()
+        await _close_murf_stream(murf_task)
+
+
+@app.get("/metrics/skills")
+async def skill_metrics():
+    return {**skill_engine.stats.snapshot(), "search_client": {**web_search.stats, "cached_queries": len(web_search.cache)}}
+
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    return {"hedging": gemini_hedger.snapshot()}
+
+
+@app.get("/metrics/turns")
+async def turn_metrics():
+    return turn_latency_report.snapshot()
+
 
+@app.get("/metrics/interruptions")
+async def interruption_metrics():
+    return interruption_stats.snapshot()
 
-@app.get("/")
+
+@app.get("/metrics/batch")
+async def batch_metrics():
+    return batch_stats.snapshot()
+
+
+audio_store = AudioStore(config.AUDIO_STORE_DIR)
+# Process-wide cap on batch pipelines, however many /batch/query requests are open
+batch_slots = asyncio.Semaphore(config.BATCH_MAX_CONCURRENCY)
+
+
+async def _process_batch_query(index: int, query: str, api_keys: dict) -> dict:
+    collector = BatchCollector()
+    await get_llm_response_stream(query, collector, [], api_keys)
+    if collector.error or not collector.text:
+        error = ErrorResponse(
+            error="pipeline_error",
+            message=collector.error or "No response was generated.",
+            query=query,
+            response=collector.text,
+            audio_url="",
+        )
+        return {"index": index, **error.model_dump()}
+
+    audio_url = ""
+    if collector.audio:
+        digest = await audio_store.put(collector.audio)
+        audio_url = f"/audio/{digest}.mp3"
+    result = LLMQueryResponse(query=query, response=collector.text, audio_url=audio_url)
+    return {"index": index, **result.model_dump()}
+
+
+@app.post("/batch/query")
+async def batch_query(request: BatchQueryRequest):
+    """Answer many queries through the voice pipeline, streaming one NDJSON line per result"""
+    concurrency = min(request.max_concurrency or config.BATCH_MAX_CONCURRENCY, config.BATCH_MAX_CONCURRENCY)
+    logging.info(f"📦 Batch of {len(request.queries)} queries with concurrency {concurrency}")
+    return StreamingResponse(
+        run_batch(request.queries, lambda i, q: _process_batch_query(i, q, request.api_keys), concurrency, batch_slots),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.get("/audio/{digest}.mp3")
+async def stored_audio(digest: str):
+    path = audio_store.path_for(digest)
+    if not path:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    return FileResponse(path, media_type="audio/mpeg", headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+
+session_store = create_session_store(config.SESSION_STORE_URL, ttl=config.SESSION_TTL)
+
+
+@app.get("/metrics/diagnostics")
+async def diagnostics_metrics():
+    if not config.DIAGNOSTICS:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "event_loop": diagnostics.lag_monitor.snapshot(),
+        "session_cpu_ms": diagnostics.cpu_accounting.snapshot(),
+    }
+
+
+profile_lock = asyncio.Lock()
+
+
+@app.get("/admin/profile")
+async def admin_profile(request: Request, seconds: float = 10.0, interval_ms: float = 10.0):
+    """Sample the live process and return collapsed stacks for flamegraph.pl / speedscope"""
+    token = request.headers.get("x-admin-token") or ""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not secrets.compare_digest(token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    seconds = min(max(seconds, 0.1), config.PROFILE_MAX_SECONDS)
+    interval = min(max(interval_ms, 1.0), 1000.0) / 1000
+    async with profile_lock:
+        logging.info(f"🔬 Sampling profile for {seconds:.1f}s every {interval * 1000:.0f} ms")
+        collapsed = await asyncio.get_running_loop().run_in_executor(
+            None, diagnostics.sample_profile, seconds, interval
+        )
+    filename = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.collapsed"
+    return PlainTextResponse(collapsed, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@app.api_route("/", methods=["GET", "HEAD"])
 async def home(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return assets.index_response(request.headers)
+
 
-async def send_client_message(ws: WebSocket, message: dict):
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+async def static_asset(path: str, request: Request):
+    response = assets.static_response(path, request.headers)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return response
+
+async def send_client_message(ws, message: dict):
     try:
         await ws.send_text(json.dumps(message))
     except ConnectionError:
@@ -621,10 +930,30 @@ async def websocket_audio_streaming(websocket: WebSocket):
     logging.info("WebSocket connection accepted.")
     main_loop = asyncio.get_running_loop()
     
-    llm_task = None
+    # Conversation state lives in the session store so a reconnect can land on any worker
+    resume_token = websocket.query_params.get("resume")
+    state = None
+    if resume_token:
+        try:
+            state = await session_store.load(resume_token)
+        except Exception as e:
+            logging.error(f"Failed to load session state: {e}")
+    resumed = state is not None
+    session_id = resume_token if resumed else new_session_id()
+    state = state or SessionState()
+    # Tasks spawned for this session inherit the label, which is what CPU accounting keys on
+    cpu_label = diagnostics.session_label(session_id)
+    diagnostics.current_session.set(cpu_label)
+    diagnostics.cpu_accounting.begin(cpu_label)
+    session_context = contextvars.copy_context()
+    # Dedupe key for this connection's AssemblyAI stream only; a repeated question after a reconnect is a new turn
     last_processed_transcript = ""
-    chat_history = []
-    session_api_keys = {}  # Store API keys for this session
+    chat_history = state.chat_history
+    session_api_keys = {}  # Store API keys for this session (never persisted)
+    turn_controller = new_turn_controller(config.TURN_ADAPTIVE, config.TURN_CONTROL_RATIO)
+    outbound = OutboundQueue(websocket)
+    outbound.start()
+    interrupts = InterruptionController(outbound)
     
     # Send default API key status to client
     default_keys_status = {
@@ -633,37 +962,61 @@ async def websocket_audio_streaming(websocket: WebSocket):
         "murf": bool(current_api_keys["murf"]),
         "tavily": bool(current_api_keys["tavily"])
     }
-    await send_client_message(websocket, {
+    await send_client_message(outbound, {
         "type": "api_keys_status", 
         "default_keys": default_keys_status
     })
+    await send_client_message(outbound, {
+        "type": "session",
+        "resume_token": session_id,
+        "resumed": resumed,
+        "history_length": len(chat_history)
+    })
+    if resumed:
+        logging.info(f"Resumed session with {len(chat_history)} history entries.")
+
+    async def save_session():
+        try:
+            await session_store.save(session_id, state)
+        except Exception as e:
+            logging.error(f"Failed to save session state: {e}")
+
+    async def respond(transcript_text: str, turn: TurnResources):
+        await get_llm_response_stream(transcript_text, turn.sender, chat_history, session_api_keys, turn)
+        await save_session()
 
     client = None  # Will be initialized when we have AssemblyAI key
 
+    def start_response(transcript_text: str, user_turn_order: int):
+        # Runs on the event loop: silence the previous answer before announcing the new turn
+        interrupts.interrupt()
+        transcript_message = { "type": "transcription", "text": transcript_text, "end_of_turn": True }
+        outbound.put(json.dumps(transcript_message))
+        interrupts.start_turn(
+            user_turn_order,
+            lambda turn: respond(transcript_text, turn),
+        )
+
     def on_turn(self: Type[StreamingClient], event: TurnEvent):
-        nonlocal last_processed_transcript, llm_task
+        with diagnostics.cpu_accounting.measure(cpu_label):
+            handle_turn(self, event)
+
+    def handle_turn(self: Type[StreamingClient], event: TurnEvent):
+        nonlocal last_processed_transcript
         transcript_text = event.transcript.strip()
-        
+
+        new_params = turn_controller.observe_turn(event.turn_order, event.end_of_turn, event.words)
+        if new_params:
+            self.set_params(StreamingSessionParameters(**new_params))
+
+        if not event.end_of_turn and len(event.words) >= config.BARGE_IN_MIN_WORDS:
+            main_loop.call_soon_threadsafe(interrupts.barge_in, event.turn_order, time.perf_counter())
+
         if event.end_of_turn and event.turn_is_formatted and transcript_text and transcript_text != last_processed_transcript:
             last_processed_transcript = transcript_text
-            
-            if llm_task and not llm_task.done():
-                logging.warning("User interrupted while previous response was generating. Cancelling task.")
-                llm_task.cancel()
-                asyncio.run_coroutine_threadsafe(
-                    send_client_message(websocket, {"type": "audio_interrupt"}), main_loop
-                )
-            
             logging.info(f"Final formatted turn: '{transcript_text}'")
-            
-            transcript_message = { "type": "transcription", "text": transcript_text, "end_of_turn": True }
-            asyncio.run_coroutine_threadsafe(send_client_message(websocket, transcript_message), main_loop)
-            
-            llm_task = asyncio.run_coroutine_threadsafe(
-                get_llm_response_stream(transcript_text, websocket, chat_history, session_api_keys), 
-                main_loop
-            )
-            
+            main_loop.call_soon_threadsafe(start_response, transcript_text, event.turn_order, context=session_context)
+
         elif transcript_text and transcript_text == last_processed_transcript:
             logging.debug(f"Duplicate turn detected, ignoring: '{transcript_text}'")
 
@@ -681,19 +1034,20 @@ async def websocket_audio_streaming(websocket: WebSocket):
                 message = await asyncio.wait_for(websocket.receive(), timeout=30.0)
             except asyncio.TimeoutError:
                 # Send ping to check if client is still connected
-                try:
-                    await websocket.send_text(json.dumps({"type": "ping"}))
+                if await outbound.deliver(json.dumps({"type": "ping"})):
                     continue
-                except Exception:
-                    logging.info("Client appears to be disconnected (ping failed)")
-                    break
+                logging.info("Client appears to be disconnected (ping failed)")
+                break
                     
             if "text" in message:
                 try:
                     data = json.loads(message['text'])
                     
                     if data.get("type") == "ping":
-                        await websocket.send_text(json.dumps({"type": "pong"}))
+                        await outbound.send_text(json.dumps({"type": "pong"}))
+
+                    elif data.get("type") == "interrupt_ack":
+                        interrupts.on_interrupt_ack(data.get("turn_id"), bool(data.get("was_playing")))
                     
                     elif data.get("type") == "update_api_keys":
                         # Update session API keys
@@ -713,20 +1067,20 @@ async def websocket_audio_streaming(websocket: WebSocket):
                                 client.on(StreamingEvents.Turn, on_turn)
                                 client.on(StreamingEvents.Termination, on_terminated)
                                 client.on(StreamingEvents.Error, on_error)
-                                client.connect(StreamingParameters(sample_rate=16000, format_turns=True))
-                                await send_client_message(websocket, {"type": "status", "message": "Connected to transcription service."})
+                                client.connect(StreamingParameters(sample_rate=16000, format_turns=True, **turn_controller.initial_params()))
+                                await send_client_message(outbound, {"type": "status", "message": "Connected to transcription service."})
                                 logging.info("AssemblyAI client initialized with user-provided key")
                             except Exception as e:
                                 logging.error(f"Failed to initialize AssemblyAI client: {e}")
-                                await send_client_message(websocket, {"type": "error", "message": "Failed to connect to transcription service"})
+                                await send_client_message(outbound, {"type": "error", "message": "Failed to connect to transcription service"})
                         
-                        await websocket.send_text(json.dumps({"type": "api_keys_updated"}))
+                        await outbound.send_text(json.dumps({"type": "api_keys_updated"}))
                     
                     elif data.get("type") == "start_transcription":
                         # Initialize client if not already done
                         assemblyai_key = session_api_keys.get('assemblyai') or current_api_keys['assemblyai']
                         if not assemblyai_key:
-                            await send_client_message(websocket, {
+                            await send_client_message(outbound, {
                                 "type": "error", 
                                 "message": "AssemblyAI API key is required. Please configure it in the settings."
                             })
@@ -739,18 +1093,22 @@ async def websocket_audio_streaming(websocket: WebSocket):
                                 client.on(StreamingEvents.Turn, on_turn)
                                 client.on(StreamingEvents.Termination, on_terminated)
                                 client.on(StreamingEvents.Error, on_error)
-                                client.connect(StreamingParameters(sample_rate=16000, format_turns=True))
-                                await send_client_message(websocket, {"type": "status", "message": "Connected to transcription service."})
+                                client.connect(StreamingParameters(sample_rate=16000, format_turns=True, **turn_controller.initial_params()))
+                                await send_client_message(outbound, {"type": "status", "message": "Connected to transcription service."})
                             except Exception as e:
                                 logging.error(f"Failed to initialize AssemblyAI client: {e}")
-                                await send_client_message(websocket, {"type": "error", "message": "Failed to connect to transcription service"})
+                                await send_client_message(outbound, {"type": "error", "message": "Failed to connect to transcription service"})
                         
                 except (json.JSONDecodeError, TypeError): 
                     pass
             elif "bytes" in message:
                 if message['bytes'] and client:
                     try:
-                        client.stream(message['bytes'])
+                        with diagnostics.cpu_accounting.measure(cpu_label):
+                            client.stream(message['bytes'])
+                            if turn_controller.on_audio(len(message['bytes'])):
+                                logging.info("⚡ Question-final pause detected, forcing end of turn")
+                                client.force_endpoint()
                     except Exception as e:
                         logging.error(f"Error streaming audio data: {e}")
             
@@ -761,14 +1119,16 @@ async def websocket_audio_streaming(websocket: WebSocket):
     finally:
         logging.info("Cleaning up connection resources.")
         
-        # Cancel LLM task quickly
-        if llm_task and not llm_task.done():
-            try:
-                llm_task.cancel()
-                logging.debug("LLM task cancelled")
-            except Exception as e:
-                logging.error(f"Error cancelling LLM task: {e}")
+        # Tear down the in-flight response (LLM stream, Murf socket, queued audio)
+        try:
+            interrupts.interrupt()
+            await outbound.close()
+            logging.debug("Active turn torn down")
+        except Exception as e:
+            logging.error(f"Error tearing down active turn: {e}")
         
+        await save_session()
+
         # Disconnect AssemblyAI client with timeout
         if client:
             try:
@@ -795,6 +1155,9 @@ async def websocket_audio_streaming(websocket: WebSocket):
         except Exception as e:
             logging.error(f"Error closing WebSocket: {e}")
         
+        cpu_seconds = diagnostics.cpu_accounting.finish(cpu_label)
+        if cpu_seconds is not None:
+            logging.info(f"Session {cpu_label} used {cpu_seconds * 1000:.0f} ms of CPU")
         logging.info("Connection cleanup completed")
 
 if __name__ == "__main__":
@@ -0,0 +1,29 @@
+from collections import deque
+from typing import Optional, Sequence
+
+
+class LatencyTracker:
+    """Rolling window of durations in seconds with nearest-rank percentiles"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def summary(self, quantiles: Sequence[float] = (0.5, 0.9, 0.99), unit: str = "ms", digits: int = 0) -> dict:
+        """Percentiles in milliseconds keyed like ``p90_ms``; None until there are samples"""
+        return {
+            f"p{int(q * 100)}_{unit}": round(self.percentile(q) * 1000, digits or None) if self._samples else None
+            for q in quantiles
+        }
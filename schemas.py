@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
 
 class TranscriptionResponse(BaseModel):
     """Schema for transcription responses"""
@@ -29,3 +29,9 @@ class ErrorResponse(BaseModel):
     query: str = Field(..., description="User query that caused the error")
     response: str = Field(..., description="Fallback response message")
     audio_url: str = Field(..., description="URL of the error audio message")
+
+class BatchQueryRequest(BaseModel):
+    """Schema for batch text-to-voice requests"""
+    queries: List[str] = Field(..., min_length=1, max_length=100, description="Queries to answer and voice")
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Upper bound on queries processed at once")
+    api_keys: Dict[str, str] = Field(default_factory=dict, description="Optional per-request API keys")
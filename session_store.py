@@ -0,0 +1,242 @@
+import abc
+import asyncio
+import json
+import logging
+import secrets
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+@dataclass
+class SessionState:
+    """Conversation state that must survive reconnects and worker restarts.
+
+    API keys are deliberately not part of it: the client re-sends them on
+    every connection and they should not be persisted server-side. Neither
+    is the transcript dedupe key, which only means something for the
+    AssemblyAI stream of a single connection.
+    """
+    chat_history: List[dict] = field(default_factory=list)
+
+    def to_bytes(self, max_history: int = 40) -> bytes:
+        payload = {"h": self.chat_history[-max_history:]}
+        return zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "SessionState":
+        payload = json.loads(zlib.decompress(blob).decode("utf-8"))
+        return cls(chat_history=payload.get("h") or [])
+
+
+def new_session_id() -> str:
+    """Unguessable id that doubles as the client's resume token"""
+    return secrets.token_urlsafe(24)
+
+
+class SessionStore(abc.ABC):
+    """Interface shared by the session-state backends"""
+
+    def __init__(self, ttl: int = 86400, max_history: int = 40, sweep_interval: float = 60.0):
+        self.ttl = ttl
+        self.max_history = max_history
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def _sweep_due(self) -> bool:
+        """True at most once per ``sweep_interval``; most sessions are never read again after they expire"""
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return False
+        self._next_sweep = now + self.sweep_interval
+        return True
+
+    async def load(self, session_id: str) -> Optional[SessionState]:
+        blob = await self._get(session_id)
+        if blob is None:
+            return None
+        try:
+            return SessionState.from_bytes(blob)
+        except Exception as e:
+            logging.warning(f"Discarding unreadable session state: {e}")
+            return None
+
+    async def save(self, session_id: str, state: SessionState):
+        await self._set(session_id, state.to_bytes(self.max_history))
+
+    @abc.abstractmethod
+    async def delete(self, session_id: str):
+        ...
+
+    async def close(self):
+        pass
+
+    @abc.abstractmethod
+    async def _get(self, session_id: str) -> Optional[bytes]:
+        ...
+
+    @abc.abstractmethod
+    async def _set(self, session_id: str, blob: bytes):
+        ...
+
+
+class MemorySessionStore(SessionStore):
+    """Per-process store; sessions do not survive restarts or move between workers"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._entries: Dict[str, Tuple[float, bytes]] = {}
+
+    async def _get(self, session_id: str) -> Optional[bytes]:
+        entry = self._entries.get(session_id)
+        if entry is None or entry[0] < time.time():
+            self._entries.pop(session_id, None)
+            return None
+        return entry[1]
+
+    async def _set(self, session_id: str, blob: bytes):
+        now = time.time()
+        if self._sweep_due():
+            self._entries = {k: v for k, v in self._entries.items() if v[0] >= now}
+        self._entries[session_id] = (now + self.ttl, blob)
+
+    async def delete(self, session_id: str):
+        self._entries.pop(session_id, None)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Single-host store shared by every worker process through one SQLite file"""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, state BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def _get_sync(self, session_id: str) -> Optional[bytes]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state FROM sessions WHERE id = ? AND expires_at > ?", (session_id, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set_sync(self, session_id: str, blob: bytes, sweep: bool):
+        with self._connect() as conn:
+            if sweep:
+                conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),))
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, state, expires_at) VALUES (?, ?, ?)",
+                (session_id, blob, time.time() + self.ttl),
+            )
+
+    def _delete_sync(self, session_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    async def _get(self, session_id: str) -> Optional[bytes]:
+        return await asyncio.get_running_loop().run_in_executor(None, self._get_sync, session_id)
+
+    async def _set(self, session_id: str, blob: bytes):
+        await asyncio.get_running_loop().run_in_executor(None, self._set_sync, session_id, blob, self._sweep_due())
+
+    async def delete(self, session_id: str):
+        await asyncio.get_running_loop().run_in_executor(None, self._delete_sync, session_id)
+
+
+class RedisSessionStore(SessionStore):
+    """Multi-node store speaking the Redis protocol (Redis, Valkey, KeyDB...) without extra dependencies"""
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, password: Optional[str] = None,
+                 prefix: str = "voice-agent:session:", **kwargs):
+        super().__init__(**kwargs)
+        self.host, self.port, self.db, self.password = host, port, db, password
+        self.prefix = prefix
+        self._connections: asyncio.LifoQueue = asyncio.LifoQueue()
+
+    async def _open(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._call(reader, writer, b"AUTH", self.password.encode())
+        if self.db:
+            await self._call(reader, writer, b"SELECT", str(self.db).encode())
+        return reader, writer
+
+    @staticmethod
+    async def _read_reply(reader: asyncio.StreamReader):
+        line = (await reader.readline()).rstrip(b"\r\n")
+        kind, rest = line[:1], line[1:]
+        if kind in (b"+", b":"):
+            return rest
+        if kind == b"-":
+            raise RuntimeError(f"Redis error: {rest.decode(errors='replace')}")
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = await reader.readexactly(length + 2)
+            return data[:-2]
+        raise RuntimeError(f"Unexpected Redis reply: {line[:40]!r}")
+
+    async def _call(self, reader, writer, *args: bytes):
+        command = b"*%d\r\n" % len(args) + b"".join(b"$%d\r\n%s\r\n" % (len(a), a) for a in args)
+        writer.write(command)
+        await writer.drain()
+        return await self._read_reply(reader)
+
+    async def _execute(self, *args: bytes):
+        connection = self._connections.get_nowait() if not self._connections.empty() else await self._open()
+        try:
+            reply = await self._call(*connection, *args)
+        except BaseException:
+            # Never return a connection with a half-read reply to the pool
+            connection[1].close()
+            raise
+        self._connections.put_nowait(connection)
+        return reply
+
+    def _key(self, session_id: str) -> bytes:
+        return (self.prefix + session_id).encode()
+
+    async def _get(self, session_id: str) -> Optional[bytes]:
+        return await self._execute(b"GET", self._key(session_id))
+
+    async def _set(self, session_id: str, blob: bytes):
+        await self._execute(b"SET", self._key(session_id), blob, b"EX", str(self.ttl).encode())
+
+    async def delete(self, session_id: str):
+        await self._execute(b"DEL", self._key(session_id))
+
+    async def close(self):
+        while not self._connections.empty():
+            _, writer = self._connections.get_nowait()
+            writer.close()
+
+
+def create_session_store(url: str, ttl: int = 86400, max_history: int = 40) -> SessionStore:
+    """Build a store from ``memory://``, ``sqlite:///path.db`` or ``redis://[:password@]host:port/db``"""
+    parsed = urlparse(url or "memory://")
+    if parsed.scheme == "memory":
+        return MemorySessionStore(ttl=ttl, max_history=max_history)
+    if parsed.scheme == "sqlite":
+        # sqlite:///relative.db or sqlite:////absolute/path.db
+        return SQLiteSessionStore(parsed.path[1:] or "sessions.db", ttl=ttl, max_history=max_history)
+    if parsed.scheme == "redis":
+        return RedisSessionStore(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(parsed.path.lstrip("/") or 0),
+            password=parsed.password,
+            ttl=ttl,
+            max_history=max_history,
+        )
+    raise ValueError(f"Unsupported session store URL: {url}")
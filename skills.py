@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from async_utils import discard
+
+
+@dataclass
+class SkillResult:
+    """Authoritative answer produced by a skill.
+
+    A result carrying ``context`` is not spoken directly; it grounds the
+    Gemini prompt instead.
+    """
+    text: str = ""
+    context: Optional[str] = None
+    speak: bool = True
+    messages: List[dict] = field(default_factory=list)
+
+
+@dataclass
+class Skill:
+    """A directly answerable intent, raced against the Gemini fallback"""
+    name: str
+    detect: Callable[[str], Optional[Any]]
+    run: Callable[[Any, dict], Awaitable[Optional[SkillResult]]]
+    deadline: float = 2.0
+    # How long the skill still gets once the racing LLM has its first token
+    grace: float = 0.3
+    race_llm: bool = True
+    speaks: bool = True
+    status_message: Optional[str] = None
+    requires_key: Optional[str] = None
+
+
+@dataclass
+class DispatchOutcome:
+    """What the engine committed to for a turn"""
+    skill: Skill
+    result: Optional[SkillResult] = None
+    fallback: Optional[asyncio.Future] = None
+
+
+class SkillStats:
+    """Per-skill outcome counters.
+
+    ``lose`` means the racing LLM was ready first and the skill missed its
+    grace period; ``empty`` means the skill finished without an answer.
+    """
+
+    OUTCOMES = ("win", "lose", "empty", "timeout", "error")
+
+    def __init__(self):
+        self._stats: Dict[str, dict] = {}
+
+    def record(self, name: str, outcome: str, elapsed: float):
+        entry = self._stats.setdefault(name, {**{o: 0 for o in self.OUTCOMES}, "total_ms": 0.0})
+        entry[outcome] += 1
+        entry["total_ms"] += elapsed * 1000
+
+    def snapshot(self) -> Dict[str, dict]:
+        snapshot = {}
+        for name, entry in self._stats.items():
+            runs = sum(entry[o] for o in self.OUTCOMES)
+            snapshot[name] = {
+                **{o: entry[o] for o in self.OUTCOMES},
+                "runs": runs,
+                "avg_ms": round(entry["total_ms"] / runs, 1) if runs else 0.0,
+            }
+        return snapshot
+
+
+class SkillEngine:
+    """Runs a matched skill under its deadline while the LLM fallback warms up"""
+
+    def __init__(self, skills: List[Skill]):
+        self.skills = skills
+        self.stats = SkillStats()
+
+    def match(self, user_text: str, api_keys: Optional[dict] = None) -> Optional[Tuple[Skill, Any]]:
+        api_keys = api_keys or {}
+        for skill in self.skills:
+            if skill.requires_key and not api_keys.get(skill.requires_key):
+                continue
+            arg = skill.detect(user_text)
+            if arg:
+                return skill, arg
+        return None
+
+    async def _race(self, skill: Skill, skill_task: asyncio.Future, fallback: Optional[asyncio.Future],
+                    started: float) -> Tuple[Optional[SkillResult], str]:
+        deadline = started + skill.deadline
+        waiting = {skill_task} if fallback is None else {skill_task, fallback}
+        fallback_ready = False
+        while True:
+            remaining = deadline - time.perf_counter()
+            done = set()
+            if remaining > 0:
+                done, _ = await asyncio.wait(waiting, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if skill_task in done:
+                if skill_task.exception() is not None:
+                    logging.warning(f"Skill '{skill.name}' failed: {skill_task.exception()}")
+                    return None, "error"
+                result = skill_task.result()
+                return result, "win" if result else "empty"
+            if not done:
+                if fallback_ready:
+                    logging.info(f"🏎️ LLM was ready first, skill '{skill.name}' missed its {skill.grace}s grace")
+                    return None, "lose"
+                logging.warning(f"⏱️ Skill '{skill.name}' missed its {skill.deadline}s deadline")
+                return None, "timeout"
+            # The fallback settled first; a failed one leaves the skill its full deadline
+            waiting.discard(fallback)
+            if not fallback.cancelled() and fallback.exception() is None:
+                fallback_ready = True
+                deadline = min(deadline, time.perf_counter() + skill.grace)
+
+    async def dispatch(
+        self,
+        skill: Skill,
+        arg: Any,
+        start_fallback: Optional[Callable[[], Awaitable]] = None,
+        api_keys: Optional[dict] = None,
+    ) -> DispatchOutcome:
+        """Race ``skill`` against ``start_fallback``.
+
+        The skill result is authoritative, so it wins whenever it lands inside
+        its deadline, or within ``grace`` of the racing fallback becoming
+        ready, whichever comes first. Otherwise the fallback (already in
+        flight when the skill allows racing) is handed back to the caller.
+        """
+        started = time.perf_counter()
+        fallback = None
+        if start_fallback and skill.race_llm:
+            fallback = asyncio.ensure_future(start_fallback())
+
+        skill_task = asyncio.ensure_future(skill.run(arg, api_keys or {}))
+        try:
+            result, outcome = await self._race(skill, skill_task, fallback, started)
+        except asyncio.CancelledError:
+            discard(skill_task)
+            discard(fallback)
+            raise
+
+        self.stats.record(skill.name, outcome, time.perf_counter() - started)
+        logging.info(f"🏁 Skill '{skill.name}' {outcome} in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        if result:
+            discard(fallback)
+            return DispatchOutcome(skill=skill, result=result)
+        discard(skill_task)
+
+        if fallback is None and start_fallback:
+            fallback = asyncio.ensure_future(start_fallback())
+        return DispatchOutcome(skill=skill, fallback=fallback)
@@ -14,6 +14,10 @@ document.addEventListener("DOMContentLoaded", () => {
     // Keep a reference to the current audio source
     let currentAudioSource = null;
 
+    // Audio tagged with a turn id below this belongs to an interrupted answer
+    let staleBeforeTurnId = 0;
+    const isStaleTurn = (turnId) => turnId != null && turnId < staleBeforeTurnId;
+
     // Store API keys
     let apiKeys = {
         gemini: "",
@@ -151,11 +155,13 @@ document.addEventListener("DOMContentLoaded", () => {
 
         console.log(`➡️ Astra: Playing me next audio chunk. ${audioQueue.length - 1} left in the queue.`);
         isPlaying = true;
-        const chunk = audioQueue.shift();
+        const { buffer: chunk, turnId } = audioQueue.shift();
 
         audioContext.decodeAudioData(
             chunk,
             (buffer) => {
+                // Interrupted while decoding: stopCurrentPlayback already reset the queue
+                if (isStaleTurn(turnId)) return;
                 const sourceNode = audioContext.createBufferSource();
                 sourceNode.buffer = buffer;
                 sourceNode.connect(audioContext.destination);
@@ -204,10 +210,14 @@ document.addEventListener("DOMContentLoaded", () => {
 
         try {
             const wsProtocol = window.location.protocol === "https:" ? "wss:" : "ws:";
-            socket = new WebSocket(`${wsProtocol}//${window.location.host}/ws`);
+            const resumeToken = sessionStorage.getItem("resume_token");
+            const resumeQuery = resumeToken ? `?resume=${encodeURIComponent(resumeToken)}` : "";
+            socket = new WebSocket(`${wsProtocol}//${window.location.host}/ws${resumeQuery}`);
 
             socket.onopen = async () => {
                 console.log("🔌 Astra: Arrr! WebSocket be open, ready fer chat!");
+                // Turn ids start again at 1 on every connection
+                staleBeforeTurnId = 0;
                 updateStatus("connecting", "Establishing Connection...");
 
                 socket.send(JSON.stringify({ type: "update_api_keys", keys: apiKeys }));
@@ -257,7 +267,12 @@ document.addEventListener("DOMContentLoaded", () => {
 
             socket.onmessage = (event) => {
                 const data = JSON.parse(event.data);
+                if (data.type !== "audio_interrupt" && isStaleTurn(data.turn_id)) return;
                 switch (data.type) {
+                    case "session":
+                        // Lets a reconnect continue this conversation on any server worker
+                        if (data.resume_token) sessionStorage.setItem("resume_token", data.resume_token);
+                        break;
                     case "transcription":
                         if (data.end_of_turn && data.text) {
                             addToChatLog(data.text, "user");
@@ -279,10 +294,18 @@ document.addEventListener("DOMContentLoaded", () => {
                         audioQueue = [];
                         audioChunkIndex = 0;
                         break;
-                    case "audio_interrupt":
+                    case "audio_interrupt": {
+                        const wasPlaying = isPlaying || audioQueue.length > 0;
+                        if (data.turn_id != null) {
+                            staleBeforeTurnId = Math.max(staleBeforeTurnId, data.turn_id + 1);
+                        }
                         stopCurrentPlayback();
                         updateStatus("listening", "Listening...");
+                        if (data.turn_id != null && socket?.readyState === WebSocket.OPEN) {
+                            socket.send(JSON.stringify({ type: "interrupt_ack", turn_id: data.turn_id, was_playing: wasPlaying }));
+                        }
                         break;
+                    }
                     case "audio":
                         if (data.data) {
                             const audioData = atob(data.data);
@@ -291,7 +314,7 @@ document.addEventListener("DOMContentLoaded", () => {
                                 byteNumbers[i] = audioData.charCodeAt(i);
                             }
                             const byteArray = new Uint8Array(byteNumbers);
-                            audioQueue.push(byteArray.buffer);
+                            audioQueue.push({ buffer: byteArray.buffer, turnId: data.turn_id });
                             if (!isPlaying) playNextChunk();
                         }
                         break;
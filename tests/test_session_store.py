@@ -0,0 +1,170 @@
+import asyncio
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import (  # noqa: E402
+    MemorySessionStore,
+    RedisSessionStore,
+    SessionState,
+    SessionStore,
+    create_session_store,
+)
+
+STATE = SessionState(chat_history=[{"role": "user", "parts": ["What's the weather in Paris?"]}])
+
+
+def test_store_interface_cannot_be_instantiated():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+
+def test_state_round_trip_caps_history():
+    state = SessionState(chat_history=[{"role": "user", "parts": [str(i)]} for i in range(100)])
+    restored = SessionState.from_bytes(state.to_bytes(max_history=40))
+    assert restored.chat_history == state.chat_history[-40:]
+
+
+def test_memory_store_sweeps_expired_sessions_on_write():
+    async def run():
+        store = MemorySessionStore(ttl=0, sweep_interval=0.0)
+        for i in range(1000):
+            await store._set(f"old-{i}", b"x")
+        await asyncio.sleep(0.01)
+        store.ttl = 60
+        await store.save("fresh", STATE)
+        return store
+
+    store = asyncio.run(run())
+    assert list(store._entries) == ["fresh"]
+
+
+def test_sqlite_store_round_trip_and_sweep(tmp_path):
+    path = tmp_path / "sessions.db"
+
+    async def run():
+        store = create_session_store(f"sqlite:///{path}", ttl=60)
+        await store.save("kept", STATE)
+        loaded = await store.load("kept")
+        store.ttl = 0
+        for i in range(50):
+            await store.save(f"old-{i}", STATE)
+        await asyncio.sleep(0.01)
+        store.ttl, store.sweep_interval, store._next_sweep = 60, 0.0, 0.0
+        await store.save("fresh", STATE)
+        expired = await store.load("old-0")
+        await store.delete("fresh")
+        return loaded, expired
+
+    loaded, expired = asyncio.run(run())
+    assert loaded == STATE
+    assert expired is None
+    with sqlite3.connect(path) as conn:
+        rows = [row[0] for row in conn.execute("SELECT id FROM sessions ORDER BY id")]
+    assert rows == ["kept"]
+
+
+async def _start_resp_stub(commands: list, password: bytes = b"secret"):
+    """Tiny Redis-protocol server backed by a dict"""
+    data = {}
+
+    async def read_command(reader):
+        header = await reader.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    async def handle(reader, writer):
+        while True:
+            args = await read_command(reader)
+            if args is None:
+                break
+            commands.append(args)
+            name = args[0].upper()
+            if name == b"AUTH":
+                writer.write(b"+OK\r\n" if args[1] == password else b"-WRONGPASS invalid password\r\n")
+            elif name == b"SELECT":
+                writer.write(b"+OK\r\n")
+            elif name == b"SET":
+                data[args[1]] = args[2]
+                writer.write(b"+OK\r\n")
+            elif name == b"GET":
+                value = data.get(args[1])
+                writer.write(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+            elif name == b"DEL":
+                writer.write(b":%d\r\n" % (data.pop(args[1], None) is not None))
+            else:
+                writer.write(b"-ERR unknown command\r\n")
+            await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def test_redis_store_against_resp_stub():
+    commands = []
+
+    async def run():
+        server = await _start_resp_stub(commands)
+        port = server.sockets[0].getsockname()[1]
+        store = create_session_store(f"redis://:secret@127.0.0.1:{port}/2", ttl=120)
+        await store.save("abc", STATE)
+        loaded = await store.load("abc")
+        missing = await store.load("nope")
+        await store.delete("abc")
+        after_delete = await store.load("abc")
+        pooled = store._connections.qsize()
+        await store.close()
+        server.close()
+        await server.wait_closed()
+        return loaded, missing, after_delete, pooled
+
+    loaded, missing, after_delete, pooled = asyncio.run(run())
+    assert loaded == STATE
+    assert missing is None and after_delete is None
+    # One pooled connection reused for every call, authenticated and pointed at db 2 once
+    assert pooled == 1
+    assert [c[0] for c in commands[:2]] == [b"AUTH", b"SELECT"]
+    set_command = next(c for c in commands if c[0] == b"SET")
+    assert set_command[1] == b"voice-agent:session:abc"
+    assert set_command[3:] == [b"EX", b"120"]
+
+
+def test_redis_error_reply_drops_the_connection():
+    async def run():
+        server = await _start_resp_stub([], password=b"other")
+        port = server.sockets[0].getsockname()[1]
+        store = RedisSessionStore(host="127.0.0.1", port=port, password="secret")
+        with pytest.raises(RuntimeError, match="WRONGPASS"):
+            await store.load("abc")
+        pooled = store._connections.qsize()
+        server.close()
+        await server.wait_closed()
+        return pooled
+
+    assert asyncio.run(run()) == 0
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (b"+OK\r\n", b"OK"),
+    (b":3\r\n", b"3"),
+    (b"$5\r\nhe\r\no\r\n", b"he\r\no"),
+    (b"$0\r\n\r\n", b""),
+    (b"$-1\r\n", None),
+])
+def test_resp_reply_parsing(raw, expected):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await RedisSessionStore._read_reply(reader)
+
+    assert asyncio.run(run()) == expected
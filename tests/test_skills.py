@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skills import Skill, SkillEngine, SkillResult  # noqa: E402
+
+
+def _skill(delay: float, answer: bool = True, deadline: float = 2.0, grace: float = 0.1) -> Skill:
+    async def run(arg, api_keys):
+        await asyncio.sleep(delay)
+        return SkillResult(text="It is sunny.") if answer else None
+    return Skill(name="weather", detect=lambda text: text, run=run, deadline=deadline, grace=grace)
+
+
+def _fallback(delay: float):
+    async def start():
+        await asyncio.sleep(delay)
+        return "gemini stream"
+    return start
+
+
+def _dispatch(skill: Skill, fallback_delay: float):
+    async def run():
+        engine = SkillEngine([skill])
+        started = time.perf_counter()
+        outcome = await engine.dispatch(skill, "paris", _fallback(fallback_delay))
+        elapsed = time.perf_counter() - started
+        if outcome.fallback is not None:
+            outcome.fallback.cancel()
+        return engine, outcome, elapsed
+
+    return asyncio.run(run())
+
+
+def test_fast_skill_wins_and_discards_fallback():
+    engine, outcome, _ = _dispatch(_skill(0.01), fallback_delay=0.5)
+    assert outcome.result.text == "It is sunny."
+    assert outcome.fallback is None
+    assert engine.stats.snapshot()["weather"]["win"] == 1
+
+
+def test_ready_llm_stops_waiting_after_grace():
+    engine, outcome, elapsed = _dispatch(_skill(1.5, grace=0.1), fallback_delay=0.05)
+    assert outcome.result is None
+    assert outcome.fallback is not None
+    assert elapsed < 0.5
+    assert engine.stats.snapshot()["weather"]["lose"] == 1
+
+
+def test_skill_without_answer_is_empty_not_lose():
+    engine, outcome, _ = _dispatch(_skill(0.01, answer=False), fallback_delay=0.5)
+    assert outcome.result is None
+    assert engine.stats.snapshot()["weather"]["empty"] == 1
+
+
+def test_slow_skill_and_llm_time_out_at_deadline():
+    engine, outcome, elapsed = _dispatch(_skill(1.0, deadline=0.1), fallback_delay=1.0)
+    assert outcome.result is None
+    assert elapsed < 0.5
+    assert engine.stats.snapshot()["weather"]["timeout"] == 1
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web_search import TavilySearch  # noqa: E402
+
+
+def _tavily_stub(payload: dict, delay: float = 0.0, calls: list = None):
+    """Local stand-in for the Tavily /search endpoint"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if calls is not None:
+            calls.append(json.loads(request.content))
+        if delay:
+            await asyncio.sleep(delay)
+        return httpx.Response(200, json=payload)
+    return httpx.MockTransport(handler)
+
+
+LONG_PAYLOAD = {
+    "answer": "A" * 1000,
+    "results": [{"title": f"Result {i}", "content": "word " * 400} for i in range(10)],
+}
+
+
+def test_digest_is_bounded():
+    async def run():
+        search = TavilySearch(max_results=3, snippet_chars=100, digest_chars=300,
+                              transport=_tavily_stub(LONG_PAYLOAD))
+        digest = await search.search("latest news on rockets", api_key="test")
+        await search.aclose()
+        return digest
+
+    digest = asyncio.run(run())
+    assert digest.startswith("Summary: ")
+    assert len(digest) <= 300
+    assert digest.count("- Result") <= 3
+
+
+def test_repeated_query_is_served_from_cache():
+    calls = []
+
+    async def run():
+        search = TavilySearch(transport=_tavily_stub(LONG_PAYLOAD, calls=calls))
+        first = await search.search("Latest news on rockets?", api_key="test")
+        second = await search.search("latest   news on ROCKETS", api_key="test")
+        await search.aclose()
+        return search, first, second
+
+    search, first, second = asyncio.run(run())
+    assert first == second
+    assert len(calls) == 1
+    assert search.stats == {"requests": 1, "cache_hits": 1, "failures": 0}
+
+
+def test_slow_search_gives_up_within_budget():
+    async def run():
+        search = TavilySearch(budget=0.05, transport=_tavily_stub(LONG_PAYLOAD, delay=1.0))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        digest = await search.search("latest news on rockets", api_key="test")
+        elapsed = loop.time() - started
+        await search.aclose()
+        return search, digest, elapsed
+
+    search, digest, elapsed = asyncio.run(run())
+    assert digest is None
+    assert elapsed < 0.5
+    assert search.stats["failures"] == 1
+    assert len(search.cache) == 0
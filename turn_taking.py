@@ -0,0 +1,243 @@
+import logging
+import random
+import threading
+from typing import List, Optional
+
+from metrics import LatencyTracker
+
+# 16 kHz, 16-bit mono PCM
+BYTES_PER_MS = 32
+
+QUESTION_STARTERS = {
+    "what", "who", "whom", "whose", "where", "when", "why", "how", "which",
+    "is", "are", "am", "was", "were", "can", "could", "would", "will", "shall",
+    "should", "do", "does", "did", "have", "has", "may", "might",
+}
+
+# Tails that close a question even without punctuation ("..., right", "..., isn't it")
+QUESTION_TAGS = {
+    ("right",), ("okay",), ("ok",), ("correct",), ("yeah",),
+    ("isn't", "it"), ("aren't", "they"), ("don't", "you"), ("didn't", "you"), ("can't", "you"),
+    ("won't", "you"), ("or", "not"),
+}
+
+# A partial ending in one of these is still going somewhere ("can you tell me ... about X")
+CONTINUATION_WORDS = {
+    "a", "an", "the", "and", "or", "but", "so", "because", "if", "that", "than", "then",
+    "of", "to", "in", "on", "at", "for", "with", "about", "from", "by", "into", "like", "as",
+    "me", "my", "your", "our", "their", "his", "her", "its", "this", "these", "those", "some",
+    "tell", "know", "think", "say", "give", "show", "find", "get", "is", "are", "was", "were",
+    "be", "can", "could", "would", "will", "should", "do", "does", "did", "have", "has",
+    "um", "uh", "er", "erm", "hmm", "well", "also", "just", "very", "more", "most",
+}
+
+SUBJECT_PRONOUNS = {"i", "you", "we", "they", "he", "she"}
+AUXILIARIES = {"do", "does", "did", "can", "could", "would", "will", "should", "shall", "may", "might"}
+
+
+def _is_question_final(words: List[str]) -> bool:
+    """Judge from how an unformatted partial ends whether it reads as a finished question"""
+    if words[-1].endswith("?"):
+        return True
+    tokens = [w.lower().strip(",.?!") for w in words]
+    if tokens[-1] in CONTINUATION_WORDS:
+        return False
+    # "what do you ..." / "can we ..." still need their verb
+    if len(tokens) > 1 and tokens[-1] in SUBJECT_PRONOUNS and tokens[-2] in AUXILIARIES:
+        return False
+    if tuple(tokens[-1:]) in QUESTION_TAGS or tuple(tokens[-2:]) in QUESTION_TAGS:
+        return True
+    return tokens[0] in QUESTION_STARTERS
+
+
+class TurnLatencyReport:
+    """End-of-turn dead time for adaptive sessions versus the static control group.
+
+    Shared by every session and updated from each session's AssemblyAI
+    callback thread, so it carries its own lock.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.groups = {"adaptive": LatencyTracker(window), "static": LatencyTracker(window)}
+        self.turns = {"adaptive": 0, "static": 0}
+        self.false_end_of_turns = {"adaptive": 0, "static": 0}
+        self.early_end_of_turns = 0
+        self._lock = threading.Lock()
+
+    def record_turn(self, group: str, is_false: bool, dead_time: float):
+        with self._lock:
+            self.turns[group] += 1
+            if is_false:
+                self.false_end_of_turns[group] += 1
+            self.groups[group].add(dead_time)
+
+    def record_early_end_of_turn(self):
+        with self._lock:
+            self.early_end_of_turns += 1
+
+    def snapshot(self) -> dict:
+        report = {}
+        with self._lock:
+            for group, tracker in self.groups.items():
+                turns = self.turns[group]
+                report[group] = {
+                    "turns": turns,
+                    "false_end_of_turn_rate": round(self.false_end_of_turns[group] / turns, 3) if turns else 0.0,
+                    **tracker.summary(),
+                }
+            report["early_end_of_turns"] = self.early_end_of_turns
+        return report
+
+
+turn_latency_report = TurnLatencyReport()
+
+
+class TurnTakingController:
+    """Adapts AssemblyAI end-of-turn parameters to one session's pause patterns.
+
+    Pauses are measured on the audio timeline from word timestamps; a turn
+    that the user resumes within ``false_gap_ms`` counts as a false end of
+    turn and pushes the parameters back up. Call ``observe_turn`` from the
+    Turn callback and ``on_audio`` for every streamed audio chunk.
+    """
+
+    def __init__(
+        self,
+        adaptive: bool = True,
+        confidence: float = 0.4,
+        confidence_bounds: tuple = (0.3, 0.8),
+        min_silence_ms: int = 400,
+        min_silence_bounds: tuple = (160, 800),
+        max_silence_ms: int = 1280,
+        false_gap_ms: int = 600,
+        target_false_rate: float = 0.1,
+        report: TurnLatencyReport = turn_latency_report,
+    ):
+        self.adaptive = adaptive
+        self.group = "adaptive" if adaptive else "static"
+        self.confidence = confidence
+        self.confidence_bounds = confidence_bounds
+        self.min_silence_ms = min_silence_ms
+        self.min_silence_bounds = min_silence_bounds
+        self.max_silence_ms = max_silence_ms
+        self.false_gap_ms = false_gap_ms
+        self.target_false_rate = target_false_rate
+        self.report = report
+
+        self.pauses = LatencyTracker(200)
+        self.false_rate = 0.0
+        self.audio_ms = 0
+        self._lock = threading.Lock()
+        self._last_turn_end_ms: Optional[int] = None
+        self._counted_turn: Optional[int] = None
+        self._early_candidate_end_ms: Optional[int] = None
+        self._early_pause_ms = min_silence_ms
+        self._early_fired_turn: Optional[int] = None
+        self._current_turn: Optional[int] = None
+        self._pushed = (min_silence_ms, confidence)
+
+    def initial_params(self) -> dict:
+        """Keyword arguments for StreamingParameters; the control group keeps server defaults"""
+        if not self.adaptive:
+            return {}
+        return {
+            "end_of_turn_confidence_threshold": self.confidence,
+            "min_end_of_turn_silence_when_confident": self.min_silence_ms,
+            "max_turn_silence": self.max_silence_ms,
+        }
+
+    def on_audio(self, num_bytes: int) -> bool:
+        """Advance the audio clock; True means the caller should force an end of turn now"""
+        with self._lock:
+            self.audio_ms += num_bytes // BYTES_PER_MS
+            if self._early_candidate_end_ms is None:
+                return False
+            if self.audio_ms - self._early_candidate_end_ms < self._early_pause_ms:
+                return False
+            self._early_candidate_end_ms = None
+            self._early_fired_turn = self._current_turn
+            self.report.record_early_end_of_turn()
+            return True
+
+    def observe_turn(self, turn_order: int, end_of_turn: bool, words: List) -> Optional[dict]:
+        """Feed a Turn event; returns new session parameters when they should be pushed"""
+        final_words = [w for w in words if w.word_is_final]
+        with self._lock:
+            self._current_turn = turn_order
+            if not end_of_turn:
+                self._update_early_candidate(turn_order, final_words, len(words))
+                return None
+
+            self._early_candidate_end_ms = None
+            # Formatted and unformatted end-of-turn events share a turn_order; count it once
+            if self._counted_turn == turn_order or not final_words:
+                return None
+            self._counted_turn = turn_order
+            return self._record_turn(final_words)
+
+    def _update_early_candidate(self, turn_order: int, final_words: List, word_count: int):
+        self._early_candidate_end_ms = None
+        if not self.adaptive or self._early_fired_turn == turn_order:
+            return
+        if self.false_rate > self.target_false_rate or len(final_words) < 3 or len(final_words) != word_count:
+            return
+        if not _is_question_final([w.text for w in final_words]):
+            return
+        # Wait out this speaker's longer mid-sentence pauses, never less than the server's own floor
+        pause_ms = self.min_silence_ms
+        if len(self.pauses) >= 10:
+            pause_ms = max(pause_ms, int(self.pauses.percentile(0.95) * 1000) + 80)
+        self._early_pause_ms = pause_ms
+        self._early_candidate_end_ms = final_words[-1].end
+
+    def _record_turn(self, final_words: List) -> Optional[dict]:
+        first_start, last_end = final_words[0].start, final_words[-1].end
+
+        is_false = self._last_turn_end_ms is not None and first_start - self._last_turn_end_ms < self.false_gap_ms
+        self.false_rate = 0.8 * self.false_rate + 0.2 * (1.0 if is_false else 0.0)
+        self._last_turn_end_ms = last_end
+
+        for previous, word in zip(final_words, final_words[1:]):
+            gap = word.start - previous.end
+            if gap > 0:
+                self.pauses.add(gap / 1000)
+
+        self.report.record_turn(self.group, is_false, max(0, self.audio_ms - last_end) / 1000)
+
+        if self.adaptive:
+            return self._retune()
+        return None
+
+    def _retune(self) -> Optional[dict]:
+        lo, hi = self.min_silence_bounds
+        c_lo, c_hi = self.confidence_bounds
+        silence, confidence = self.min_silence_ms, self.confidence
+
+        if len(self.pauses) >= 10:
+            # Stay just above the pauses this speaker makes mid-sentence
+            silence = int(self.pauses.percentile(0.9) * 1000) + 80
+        if self.false_rate > self.target_false_rate:
+            silence = max(silence, self.min_silence_ms + 80)
+            confidence += 0.05
+        elif self.false_rate < self.target_false_rate / 2:
+            confidence -= 0.02
+
+        self.min_silence_ms = min(hi, max(lo, silence))
+        self.confidence = round(min(c_hi, max(c_lo, confidence)), 2)
+        pushed_silence, pushed_confidence = self._pushed
+        if abs(self.min_silence_ms - pushed_silence) < 40 and abs(self.confidence - pushed_confidence) < 0.05:
+            return None
+
+        silence, confidence = self.min_silence_ms, self.confidence
+        self._pushed = (silence, confidence)
+        logging.info(f"🎚️ End-of-turn tuned: confidence={confidence}, min_silence={silence} ms (false rate {self.false_rate:.2f})")
+        return {
+            "end_of_turn_confidence_threshold": confidence,
+            "min_end_of_turn_silence_when_confident": silence,
+        }
+
+
+def new_turn_controller(adaptive_enabled: bool, control_ratio: float) -> TurnTakingController:
+    """Create a session controller, keeping ``control_ratio`` of sessions on static defaults as a baseline"""
+    adaptive = adaptive_enabled and random.random() >= control_ratio
+    return TurnTakingController(adaptive=adaptive)
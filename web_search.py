@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import httpx
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so near-identical questions share a cache slot"""
+    query = re.sub(r"[^\w\s]", " ", (query or "").lower())
+    return re.sub(r"\s+", " ", query).strip()
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, ttl: float, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TavilySearch:
+    """Tavily search over a pooled async client, returning a compact digest for the LLM prompt"""
+
+    def __init__(
+        self,
+        base_url: str = "https://api.tavily.com",
+        budget: float = 2.5,
+        cache_ttl: float = 300.0,
+        max_results: int = 3,
+        snippet_chars: int = 240,
+        digest_chars: int = 900,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.budget = budget
+        self.max_results = max_results
+        self.snippet_chars = snippet_chars
+        self.digest_chars = digest_chars
+        self.cache = TTLCache(cache_ttl)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.stats = {"requests": 0, "cache_hits": 0, "failures": 0}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.budget, connect=min(self.budget, 1.0)),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _digest(self, payload: dict) -> Optional[str]:
+        lines = []
+        answer = (payload.get("answer") or "").strip()
+        if answer:
+            lines.append(f"Summary: {answer[:self.snippet_chars]}")
+        for result in (payload.get("results") or [])[:self.max_results]:
+            title = (result.get("title") or "").strip()
+            content = re.sub(r"\s+", " ", result.get("content") or "").strip()
+            if not (title or content):
+                continue
+            lines.append(f"- {title}: {content[:self.snippet_chars]}")
+        digest = "\n".join(lines)[:self.digest_chars]
+        return digest or None
+
+    async def search(self, query: str, api_key: str) -> Optional[str]:
+        """Return a snippet digest for ``query``, or None if nothing arrived within the budget"""
+        key = normalize_query(query)
+        if not key:
+            return None
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            logging.info(f"🔎 Search cache hit for '{key}'")
+            return cached
+
+        self.stats["requests"] += 1
+        try:
+            response = await asyncio.wait_for(
+                self._get_client().post("/search", json={
+                    "api_key": api_key,
+                    "query": query,
+                    "max_results": self.max_results,
+                    "search_depth": "basic",
+                    "include_answer": True,
+                }),
+                timeout=self.budget,
+            )
+            response.raise_for_status()
+            digest = self._digest(response.json())
+        except Exception as e:
+            self.stats["failures"] += 1
+            logging.warning(f"Tavily search failed: {e!r}")
+            return None
+
+        if digest:
+            self.cache.set(key, digest)
+        return digest